@@ -0,0 +1,69 @@
+"""
+Cold-start benchmark for the modules worker processes import.
+
+Each measurement runs a fresh interpreter, so it reflects what a spawn-based
+process pool pays per worker. Times exclude the bare interpreter start-up.
+Budgets are multiples of a bare `import numpy` measured in the same run, so
+they follow the speed of the machine rather than fixed milliseconds.
+
+    python benchmarks/startup.py [--runs 9]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets as multiples of `import numpy`, which every worker pays anyway
+BUDGETS = {
+    'import cipher_utils': 2.0,
+    'import ciphers': 3.0,
+    'import cipher_manager': 3.0,
+    'first bigram_fitness call': 2.0,
+}
+
+SNIPPETS = {
+    'import cipher_utils': 'import cipher_utils',
+    'import ciphers': 'import ciphers',
+    'import cipher_manager': 'import cipher_manager',
+    'first bigram_fitness call': 'import cipher_utils; cipher_utils.bigram_fitness("startup")',
+}
+
+
+def time_snippet(code, runs):
+    """Median wall time of running code in a fresh interpreter, in ms"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold-start import times')
+    parser.add_argument('--runs', type=int, default=9, help='Fresh interpreters per measurement')
+    args = parser.parse_args()
+
+    baseline = time_snippet('pass', args.runs)
+    numpy_ms = time_snippet('import numpy', args.runs) - baseline
+    print(f"Bare interpreter: {baseline:.0f} ms")
+    print(f"import numpy: {numpy_ms:.0f} ms\n")
+    print(f"{'Measurement':<28}{'ms':>8}{'budget':>8}{'x numpy':>9}")
+
+    over_budget = False
+    for name, code in SNIPPETS.items():
+        elapsed = time_snippet(code, args.runs) - baseline
+        budget = BUDGETS[name] * numpy_ms
+        status = '' if elapsed <= budget else '  OVER BUDGET'
+        over_budget |= elapsed > budget
+        print(f"{name:<28}{elapsed:>8.0f}{budget:>8.0f}{elapsed / numpy_ms:>9.2f}{status}")
+
+    sys.exit(1 if over_budget else 0)
+
+if __name__ == "__main__":
+    main()
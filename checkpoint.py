@@ -0,0 +1,118 @@
+"""
+Checkpoints for long-running searches.
+
+With CHECKPOINTS on, a search saves a small dict of its state (keys,
+scores, temperature, iteration, RNG state, ...) now and then. Only with
+CHECKPOINT_RESUME on does a search started again on the same input with the
+same settings pick up from the last one; otherwise it starts afresh. A run
+that completes (target reached or search space exhausted) clears its
+checkpoint; a stopped or killed one keeps it to resume from, until
+clear_checkpoints() discards it. Files are written
+to a temporary name and moved into place with os.replace, so a process
+killed mid-write leaves the previous checkpoint intact. Writes are
+throttled so that their measured cost stays below CHECKPOINT_BUDGET of the
+run time, and never more often than every CHECKPOINT_INTERVAL seconds.
+
+    checkpoint = run_checkpoint('playfair', ciphertext, mode)
+    state = checkpoint.load()  # None on a fresh start
+    ...
+    if checkpoint.due():
+        checkpoint.save(state)
+    ...
+    checkpoint.clear()  # Completed; the next run starts afresh
+
+Checkpoints are pickles: only resume from a CHECKPOINT_DIR you trust.
+"""
+
+import os
+import time
+import pickle
+import hashlib
+import tempfile
+import config
+
+
+class Checkpoint:
+    """Atomic, throttled save and load of one search's state"""
+
+    def __init__(self, path, budget=None, interval=None, resume=None):
+        self.path = path
+        self.resume = config.CHECKPOINT_RESUME if resume is None else resume
+        self.budget = config.CHECKPOINT_BUDGET if budget is None else budget
+        self.interval = config.CHECKPOINT_INTERVAL if interval is None else interval
+        self.last_save = time.time()
+        self.cost = 0.0  # Seconds taken by the last save
+
+    def due(self):
+        """True once enough time has passed for the next save to fit the budget"""
+        wait = max(self.interval, self.cost / self.budget if self.budget > 0 else 0.0)
+        return time.time() - self.last_save >= wait
+
+    def save(self, state):
+        start = time.time()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.last_save = time.time()
+        self.cost = self.last_save - start
+
+    def load(self):
+        """The saved state, or None if there is none, it cannot be read or resume is off"""
+        if not self.resume:
+            return None
+        try:
+            with open(self.path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def fitness_name(fitness):
+    """Stable name of a fitness function for telling runs apart"""
+    if hasattr(fitness, 'n'):
+        return f"{fitness.n}-gram"
+    return getattr(fitness, '__name__', type(fitness).__name__)
+
+
+def _digest(value):
+    return hashlib.sha1(repr(value).encode('utf-8')).hexdigest()[:16]
+
+
+def _text_prefix(cipher, text):
+    """File name prefix shared by every run of cipher on the letters of text"""
+    letters = ''.join(c for c in text.upper() if c.isalpha())
+    return f"{cipher}-{_digest(letters)}-"
+
+
+def run_checkpoint(cipher, text, *settings):
+    """Checkpoint of a run on text with the given settings, or None when disabled"""
+    if not config.CHECKPOINTS:
+        return None
+    name = _text_prefix(cipher, text) + _digest((cipher, text, settings)) + '.ckpt'
+    return Checkpoint(os.path.join(config.CHECKPOINT_DIR, name))
+
+
+def clear_checkpoints(cipher, text):
+    """Remove the checkpoints of every run of cipher on text, whatever its settings"""
+    prefix = _text_prefix(cipher, text)
+    try:
+        names = os.listdir(config.CHECKPOINT_DIR)
+    except OSError:
+        return
+    for name in names:
+        if name.startswith(prefix) and name.endswith('.ckpt'):
+            os.remove(os.path.join(config.CHECKPOINT_DIR, name))
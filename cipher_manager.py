@@ -1,12 +1,25 @@
-from cipher_utils import bigram_fitness
+from cipher_utils import bigram_fitness, skip_report
+from ngram_scorer import get_scorer, scorer_target
 import config
 from ciphers import VigenereCracker, SubstitutionCracker, ShuffleCracker, PolybiusCracker, PlayfairCracker
 
-def run_substitution_process_wrapper(cipher_text, queue):
-    """Standalone wrapper function for running substitution process"""
+def run_substitution_process_wrapper(cipher_text, queue, scorer='bigram', mode='anneal', status=None,
+                                     chains=None, target=None):
+    """Standalone wrapper function for running substitution process.
+
+    The queue only carries 'started' and 'finished' events; progress goes to
+    the StatusBoard named by status. chains and target default to the current
+    config.MAX_WORKERS / config.USE_PARALLEL and config.TARGET_FITNESS
+    settings; a spawned process re-imports config, so a caller in another
+    process passes the values it sees.
+    """
     from ciphers.substitution import run_substitution_process
     try:
-        result = run_substitution_process(cipher_text, queue)
+        if queue:
+            queue.put({'type': 'started'})
+        if target is None:
+            target = config.TARGET_FITNESS
+        result = run_substitution_process(cipher_text, status, scorer, chains, mode=mode, target=target)
         if queue:
             queue.put({'type': 'finished', 'result': result})
         return result
@@ -44,48 +57,71 @@ class CipherManager:
         if 'progress_callback' in kwargs:
             cracker.progress_callback = kwargs.pop('progress_callback')
         
-        # Get queue 
+        # Get queue (start and finish events only)
         queue = kwargs.pop('queue', None)
+
+        # StatusBoard the cracker posts its best result so far to
+        status = kwargs.pop('status', None)
+
+        # Fitness function: 'bigram' (default), 'trigram' or 'quadgram'
+        scorer = kwargs.pop('scorer', 'bigram')
+
+        # Solver: 'anneal' (default), 'jakobsen' (substitution) or 'steepest'
+        mode = kwargs.pop('mode', 'anneal')
         
         try:
             if self.current_cipher == 'substitution':
-                return run_substitution_process_wrapper(cipher_text, queue)
+                return run_substitution_process_wrapper(cipher_text, queue, scorer, mode,
+                                                        status.name if status else None)
             else:
-                # Set target fitness on cracker instance instead of passing as parameter
+                if queue:
+                    queue.put({'type': 'started'})
+                cracker.status = status
+                cracker.fitness_function = get_scorer(scorer)
+                if hasattr(cracker, 'mode'):
+                    if mode not in cracker.MODES:
+                        raise ValueError(f"Unknown {self.current_cipher} mode: {mode}")
+                    cracker.mode = mode
+
+                # Set target fitness on cracker instance instead of passing as parameter;
+                # targets are bigram scores, so other scorers get none
                 target_fitness = getattr(config, f"{self.current_cipher.upper()}_TARGET_FITNESS", 0.4)
                 if hasattr(cracker, 'target_fitness'):
-                    cracker.target_fitness = target_fitness
+                    cracker.target_fitness = scorer_target(scorer, target_fitness)
                 
-                # Build decrypt kwargs - include queue for shuffle cipher
+                # Build decrypt kwargs
                 decrypt_kwargs = {
                     'forced_length': kwargs.get('forced_length'),
                     'initial_key': kwargs.get('initial_key')
                 }
                 
-                # Add queue for shuffle cipher to enable progress updates
-                if self.current_cipher == 'shuffle':
-                    decrypt_kwargs['queue'] = queue
-                
                 # Remove None values
                 decrypt_kwargs = {k: v for k, v in decrypt_kwargs.items() if v is not None}
                 
                 plaintext, key, score = cracker.decrypt(cipher_text, **decrypt_kwargs)
+                if status:
+                    # Annealers report how many iterations ran; otherwise the
+                    # board keeps the count the cracker last published
+                    stopping = getattr(cracker, 'stopping', None) or {}
+                    status.publish(score, key, plaintext, stopping.get('iterations'))
                 
-                # Send final result to queue
-                if queue:
-                    queue.put({
-                        'type': 'progress',
-                        'score': score,
-                        'text': plaintext,
-                        'key': str(key)
-                    })
-                
-                return {
+                result = {
                     'plaintext': plaintext,
                     'key': key,
                     'score': score,
                     'success': True
                 }
+                if getattr(cracker, 'score_cache', None):
+                    result['cache_stats'] = cracker.score_cache.stats()
+                if getattr(cracker, 'bounded_scoring', False):
+                    result['bounded_scoring'] = skip_report(cracker.bounded_stats)
+                if getattr(cracker, 'stopping', None):
+                    result['stopping'] = cracker.stopping
+                if getattr(cracker, 'proposal_stats', None):
+                    result['proposals'] = cracker.proposal_stats
+                if getattr(cracker, 'length_ranking', None):
+                    result['length_ranking'] = cracker.length_ranking
+                return result
 
         except Exception as e:
             return {
@@ -6,9 +6,63 @@ Created on Thu Oct 17 22:17:13 2024
 @Nono5000
 """
 
-from nltk.util import bigrams
+import os
+import sys
+import math
+import random
+from collections import OrderedDict
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# English bigram frequencies as a 26x26 float64 array (a=0 ... z=25); NaN marks
+# pairs that are not part of the table and are ignored when scoring
+BIGRAM_TABLE_PATH = os.path.join(DATA_DIR, 'bigram_freqs.npy')
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
+OTHER_LETTER = 26  # Code for alphabetic characters outside a-z (e.g. accented)
+
+_bigram_table = None
+_bigram_dict = None
+
+
+def bigram_table():
+    """(frequency matrix, mask of pairs in the table), loaded on first use"""
+    global _bigram_table
+    if _bigram_table is None:
+        freqs = np.load(BIGRAM_TABLE_PATH)
+        mask = ~np.isnan(freqs)
+        _bigram_table = (np.where(mask, freqs, 0.0), mask)
+    return _bigram_table
+
+
+def use_bigram_table(path):
+    """Score with the bigram table at path (e.g. a domain-specific model)"""
+    global BIGRAM_TABLE_PATH, _bigram_table, _bigram_dict
+    BIGRAM_TABLE_PATH = path
+    _bigram_table = None
+    _bigram_dict = None
+
+
+def bigram_dict():
+    """The bigram table as the original {('t', 'h'): frequency} dict"""
+    global _bigram_dict
+    if _bigram_dict is None:
+        matrix, mask = bigram_table()
+        _bigram_dict = {(ALPHABET[a], ALPHABET[b]): float(matrix[a, b])
+                        for a, b in zip(*np.nonzero(mask))}
+    return _bigram_dict
+
+
+def __getattr__(name):
+    # These used to be built at import time; keep them available lazily
+    if name == 'bigramdict':
+        return bigram_dict()
+    if name == 'BIGRAM_MATRIX':
+        return bigram_table()[0]
+    if name == 'BIGRAM_MASK':
+        return bigram_table()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-bigramdict = {('b', 'm'): 3.772099445185284e-05, ('a', 'v'): 0.0017876379661176962, ('v', 'o'): 0.0005059670820050205, ('t', 'u'): 0.002040094677588756, ('a', 'u'): 0.0009227946072886234, ('y', 'i'): 0.0011489098421871601, ('r', 'b'): 0.0007025798631423316, ('d', 'j'): 0.0001643708138125431, ('b', 'v'): 4.6571730580220546e-05, ('z', 'm'): 5.900490752245136e-06, ('k', 'k'): 1.5804885943513758e-05, ('s', 'g'): 0.0004134558162823199, ('g', 'k'): 1.2854640567391191e-05, ('q', 's'): 4.2146362516036693e-07, ('t', 'q'): 3.498148088831045e-05, ('a', 'q'): 4.720392601796109e-05, ('r', 'o'): 0.006600963297261666, ('t', 'f'): 0.0007988843014914755, ('p', 'w'): 9.061467940947888e-05, ('z', 'v'): 2.1073181258018346e-06, ('d', 'z'): 5.900490752245136e-06, ('u', 'l'): 0.002784188707809384, ('p', 'n'): 1.7490740444155225e-05, ('w', 's'): 0.0003647767675762976, ('u', 'w'): 8.977175215915815e-05, ('i', 'm'): 0.0027578472312368607, ('h', 'o'): 0.004506921275652383, ('x', 'l'): 9.272199753528072e-06, ('k', 'e'): 0.0022337572133499448, ('y', 's'): 0.0016961803594578966, ('g', 'e'): 0.0030680444593548907, ('x', 'w'): 3.0345381011546418e-05, ('q', 'x'): 2.1073181258018347e-07, ('i', 'v'): 0.002029347355147167, ('m', 'r'): 0.00036498749938887774, ('r', 'g'): 0.0009324882706673118, ('f', 'y'): 0.00017132496362768916, ('l', 'a'): 0.004693840393411006, ('e', 'l'): 0.0054115929470591115, ('q', 'b'): 8.429272503207339e-07, ('h', 'g'): 9.187907028495999e-05, ('y', 'x'): 1.475122688061284e-06, ('b', 's'): 0.0003230518686854212, ('e', 'w'): 0.003911393173300785, ('i', 'i'): 3.6456603576371735e-05, ('w', 'b'): 9.630443834914384e-05, ('a', 'x'): 0.00017006057275220806, ('s', 'l'): 0.0011219361701768967, ('z', 's'): 5.6897589396649534e-06, ('y', 'b'): 0.0007038442540178128, ('s', 'w'): 0.0021119542256785987, ('p', 'k'): 1.0747322441589356e-05, ('c', 'p'): 9.841175647494568e-05, ('a', 'b'): 0.002048102486466803, ('l', 'h'): 0.0003247377231860627, ('v', 'l'): 2.1073181258018346e-06, ('m', 'm'): 0.0008182716282488523, ('w', 'y'): 0.00012369957398456768, ('o', 'p'): 0.002120804961806966, ('i', 's'): 0.008908265913202096, ('d', 'n'): 0.0008441916411962149, ('b', 'b'): 0.00013191811467519484, ('t', 'o'): 0.010478217916924461, ('a', 'o'): 0.00013318250555067595, ('y', 'y'): 9.145760665979961e-05, ('m', 'v'): 1.9598058569957062e-05, ('c', 'k'): 0.001339200668947066, ('r', 'l'): 0.0011008629889188784, ('p', 'd'): 2.6762940197683297e-05, ('k', 'r'): 5.457953945826751e-05, ('p', 'e'): 0.003679377447650003, ('o', 'k'): 0.0007240745080255103, ('j', 'f'): 2.1073181258018346e-06, ('g', 'r'): 0.0017400125764745749, ('z', 'b'): 5.057563501924403e-06, ('r', 'w'): 0.0008283867552527012, ('j', 'q'): 2.1073181258018347e-07, ('u', 'd'): 0.0007571594026005991, ('i', 'x'): 0.00015699520037223668, ('e', 't'): 0.008091890871266464, ('h', 'l'): 0.0002280118212117585, ('t', 'g'): 0.0002724762336661772, ('a', 'g'): 0.001859708246020119, ('b', 'y'): 0.0012207693902770028, ('h', 'w'): 0.00038016018989465094, ('x', 'd'): 8.218540690627155e-06, ('i', 'b'): 0.0007118520628958598, ('v', 'a'): 0.0009187907028495999, ('s', 't'): 0.012408942783784103, ('z', 'y'): 2.4023426634140915e-05, ('d', 'p'): 0.0007331359759664583, ('e', 'd'): 0.011490573544559663, ('n', 'j'): 0.00018734058138378308, ('l', 'c'): 0.0005080744001308223, ('v', 't'): 7.797077065466788e-06, ('m', 's'): 0.0009554580382385518, ('k', 'm'): 6.848783908855962e-05, ('d', 'k'): 8.513565228239412e-05, ('g', 'm'): 0.0002846986787958279, ('i', 'y'): 5.268295314504587e-06, ('n', 'z'): 2.80273310731644e-05, ('f', 'a'): 0.0022689494260508354, ('c', 'h'): 0.004629567190574051, ('r', 't'): 0.004797098981575296, ('g', 'v'): 3.7510262639272653e-05, ('o', 'h'): 0.0007721213612937922, ('m', 'x'): 4.2146362516036693e-07, ('p', 'r'): 0.003276458221996692, ('d', 'e'): 0.006297088023521042, ('l', 'u'): 0.0010675673625312094, ('t', 'l'): 0.0013689138545208716, ('a', 'l'): 0.008240456799135494, ('k', 'i'): 0.0010340610043309603, ('g', 'i'): 0.0016540339969418599, ('m', 'b'): 0.0008882345900254733, ('t', 'w'): 0.0020582176134706517, ('r', 'd'): 0.0018940575314706888, ('q', 'a'): 2.318049938382018e-06, ('f', 'h'): 0.0005127105000075863, ('l', 'q'): 2.1073181258018346e-05, ('l', 'f'): 0.0007896121017379474, ('w', 'a'): 0.0041598459803328216, ('h', 'd'): 0.00014730153699354822, ('j', 'g'): 1.2643908754811007e-06, ('y', 'a'): 0.0017284223267826646, ('k', 's'): 0.0005017524457534168, ('m', 'y'): 0.000492690977812469, ('q', 't'): 1.8965863132216511e-06, ('g', 's'): 0.0007896121017379474, ('w', 't'): 0.0003477074907573027, ('q', 'h'): 6.321954377405503e-07, ('c', 'c'): 0.0005986890795403012, ('w', 'h'): 0.0032655001677425227, ('o', 'c'): 0.0016588808286312042, ('b', 'a'): 0.0013729177589598951, ('n', 'n'): 0.0009948648871910461, ('y', 'h'): 0.0006707593594427239, ('c', 'm'): 5.3315148582786415e-05, ('t', 't'): 0.004981700049395537, ('a', 't'): 0.011667588267127018, ('z', 'a'): 0.0001759610635044532, ('o', 'm'): 0.004825337044461041, ('d', 'r'): 0.0012614406301049781, ('p', 'i'): 0.0011904240092654563, ('c', 'v'): 1.8122935881895778e-05, ('b', 't'): 0.00013781860542743998, ('f', 'c'): 0.00048573682799732284, ('o', 'v'): 0.0015592046812807775, ('l', 'b'): 0.000512289036382426, ('b', 'h'): 1.5594154130933575e-05, ('z', 't'): 8.218540690627155e-06, ('i', 'a'): 0.0019465297528031547, ('v', 'q'): 2.1073181258018347e-07, ('t', 'd'): 0.0005527495443978212, ('x', 'i'): 0.00024339524353011188, ('v', 'f'): 2.5287817509622014e-06, ('l', 'o'): 0.003561999828042841, ('j', 'w'): 3.3717090012829355e-06, ('k', 'y'): 0.0001133737151681387, ('n', 'p'): 0.0006197622607983195, ('j', 'n'): 8.429272503207339e-07, ('g', 'y'): 0.00017532886806671263, ('p', 'j'): 6.954149815146054e-06, ('f', 'v'): 6.764491183823889e-05, ('p', 's'): 0.0004977485413143933, ('u', 'j'): 1.0325858816428989e-05, ('f', 'u'): 0.000846509691134597, ('n', 'k'): 0.0005407378310807508, ('d', 'm'): 0.0009211087527879819, ('w', 'c'): 9.4197120223342e-05, ('p', 'z'): 2.1073181258018347e-07, ('l', 'g'): 0.00018396887238250015, ('i', 'h'): 0.00015235910049547264, ('x', 'j'): 1.2643908754811007e-06, ('u', 'z'): 2.4866353884461647e-05, ('f', 'q'): 1.0325858816428989e-05, ('y', 'c'): 0.000672023750318205, ('d', 'v'): 0.00024360597534269206, ('x', 'z'): 2.1073181258018347e-07, ('n', 'e'): 0.006390652948306643, ('e', 'j'): 0.00026531135203845097, ('q', 'u'): 0.0010553449174015587, ('m', 'a'): 0.004891506833611219, ('d', 'i'): 0.005274406537069412, ('w', 'u'): 4.277855795377724e-05, ('b', 'c'): 2.444489025930128e-05, ('o', 'x'): 0.00010789468804105393, ('j', 'k'): 2.1073181258018347e-07, ('s', 'j'): 0.0001272820147984308, ('e', 'z'): 5.0575635019244026e-05, ('q', 'f'): 1.2643908754811007e-06, ('y', 'u'): 0.00014350836436710494, ('c', 'b'): 5.247222133246568e-05, ('w', 'q'): 3.3717090012829355e-06, ('w', 'f'): 7.312393896532366e-05, ('m', 't'): 0.0007940374698021313, ('o', 'b'): 0.0014125353397249696, ('s', 'z'): 8.640004315787521e-06, ('y', 'q'): 1.833366769447596e-05, ('y', 'f'): 0.0005929993206006363, ('h', 'i'): 0.007257814357074098, ('m', 'h'): 0.00022126840320919262, ('d', 's'): 0.0025058119833909613, ('f', 'x'): 6.321954377405503e-07, ('l', 'l'): 0.005243218228807544, ('j', 'd'): 4.425368064183853e-06, ('j', 'e'): 0.0003504470043208451, ('b', 'u'): 0.0017267364722820232, ('i', 'c'): 0.00520381137985505, ('l', 'w'): 0.00043958656104226267, ('a', 'f'): 0.0009560902336762923, ('c', 'y'): 0.0002532996387213805, ('r', 'j'): 9.335419297302127e-05, ('f', 'b'): 0.00022885474846207922, ('v', 'g'): 1.0536590629009173e-06, ('z', 'u'): 6.743418002565871e-06, ('o', 'y'): 0.00041450947534522084, ('u', 'n'): 0.0033261909297656158, ('b', 'f'): 1.4540495068032658e-05, ('d', 'x'): 4.2146362516036693e-07, ('h', 'j'): 3.097757644928697e-05, ('f', 'o'): 0.004182183552466321, ('r', 'z'): 1.0536590629009173e-05, ('x', 'n'): 4.214636251603669e-06, ('k', 'a'): 0.00045054461529643223, ('z', 'f'): 3.582440813863119e-06, ('n', 'r'): 0.00045159827435933315, ('g', 'a'): 0.002119119107306325, ('i', 'u'): 9.841175647494568e-05, ('d', 'b'): 0.0016167344661151674, ('h', 'z'): 5.47902712708477e-06, ('f', 'g'): 0.00017027130456478824, ('e', 'n'): 0.012079147497096116, ('i', 'q'): 9.546151109882311e-05, ('p', 'p'): 0.0011362659334323492, ('i', 'f'): 0.001572480785473329, ('q', 'o'): 1.2643908754811007e-06, ('u', 'p'): 0.0011714581461332398, ('k', 'h'): 0.00017385374537865134, ('d', 'y'): 0.000655797400749531, ('l', 't'): 0.0015729022490984894, ('w', 'o'): 0.002098467389673467, ('g', 'h'): 0.0025142412558941687, ('m', 'c'): 0.00015699520037223668, ('s', 'n'): 0.00099929025525523, ('x', 'p'): 0.000526197336012718, ('j', 'r'): 1.7912204069315595e-05, ('y', 'o'): 0.0023195250610700793, ('u', 'k'): 4.572880332989981e-05, ('n', 'm'): 0.0007946696652398718, ('v', 'w'): 8.00780887804697e-06, ('c', 'l'): 0.0012123401177737954, ('v', 'n'): 2.1073181258018346e-06, ('x', 'k'): 1.475122688061284e-06, ('w', 'g'): 2.7184403822843667e-05, ('o', 'l'): 0.003081742027172603, ('t', 'j'): 9.841175647494568e-05, ('n', 'v'): 0.00043726851110388067, ('l', 'd'): 0.0027043213508414943, ('a', 'j'): 0.00011632396054426127, ('e', 'p'): 0.0034684349032572397, ('m', 'u'): 0.0010309000271422574, ('b', 'o'): 0.001759610635044532, ('y', 'g'): 0.0002191610850833908, ('r', 'n'): 0.0015229588095169858, ('u', 'e'): 0.001049865890274474, ('t', 'z'): 3.5402944513470824e-05, ('a', 'z'): 0.00013676494636453906, ('s', 'p'): 0.0023800050912805917, ('e', 'k'): 0.0004760431646186344, ('n', 'i'): 0.0040114907842763725, ('z', 'o'): 4.931124414376293e-05, ('m', 'q'): 4.84683168934422e-06, ('f', 'l'): 0.0007084803538945768, ('m', 'f'): 0.0001666888637509251, ('x', 'e'): 0.00014203324167904365, ('h', 'n'): 0.0003215767459973599, ('f', 'w'): 0.0003080899099922282, ('b', 'g'): 7.375613440306421e-06, ('c', 'a'): 0.00418070842977826, ('s', 'k'): 0.00048510463255958233, ('k', 'c'): 7.249174352758311e-05, ('g', 'c'): 0.00024529182984333356, ('i', 'o'): 0.0054545822368254684, ('o', 'a'): 0.0013792397133373007, ('p', 'h'): 0.0007247067034632508, ('e', 'e'): 0.004541692024728114, ('z', 'g'): 3.1609771887027516e-06, ('n', 's'): 0.004811850208455909, ('v', 'k'): 1.475122688061284e-06, ('r', 'p'): 0.000878751658459365, ('q', 'l'): 2.739513563542385e-06, ('c', 't'): 0.003096071790428055, ('q', 'w'): 1.475122688061284e-06, ('w', 'l'): 0.00015615227312191593, ('s', 'd'): 0.0007531554981615757, ('q', 'n'): 1.0536590629009173e-06, ('s', 'e'): 0.007398793939690241, ('o', 't'): 0.004933231732502094, ('j', 'i'): 2.7605867448004033e-05, ('k', 'v'): 8.218540690627155e-06, ('w', 'w'): 0.00013023226017455338, ('i', 'g'): 0.0021684303514500876, ('h', 'p'): 0.0002025132718895563, ('r', 'k'): 0.0008267009007520597, ('k', 'u'): 4.8679048706022376e-05, ('y', 'l'): 0.0004050265437791126, ('g', 'u'): 0.0007093232811448975, ('n', 'x'): 2.1705376695758895e-05, ('y', 'w'): 0.0008979282534041617, ('v', 'd'): 3.582440813863119e-06, ('v', 'e'): 0.0064814783595287025, ('h', 'k'): 2.1705376695758895e-05, ('k', 'q'): 2.5287817509622014e-06, ('f', 't'): 0.003630909130756561, ('u', 'r'): 0.003987045894017071, ('k', 'f'): 0.0001121093242926576, ('g', 'q'): 1.2854640567391191e-05, ('d', 'a'): 0.003668630125208414, ('a', 'w'): 0.0008599965271397287, ('n', 'b'): 0.0007613740388522028, ('g', 'f'): 0.000307879178179648, ('t', 'n'): 0.00043853290197936175, ('a', 'n'): 0.015638618543387994, ('j', 'j'): 1.8965863132216511e-06, ('j', 's'): 1.2643908754811007e-06, ('b', 'l'): 0.0018799385000278165, ('r', 'e'): 0.014573579962607747, ('x', 'r'): 1.643708138125431e-05, ('b', 'w'): 2.2759035758659814e-05, ('m', 'o'): 0.0030170473607104864, ('z', 'l'): 2.4234158446721098e-05, ('d', 't'): 0.004078714232489451, ('h', 'e'): 0.026082908638487046, ('p', 'c'): 3.7299530826692474e-05, ('z', 'w'): 6.743418002565871e-06, ('z', 'n'): 4.2146362516036693e-07, ('n', 'y'): 0.0010399614950832054, ('e', 'r'): 0.01750528093922326, ('d', 'h'): 0.001443934379799417, ('p', 'm'): 0.0001820722860692785, ('m', 'g'): 5.563319852116843e-05, ('i', 'l'): 0.003704243801534465, ('t', 'p'): 0.000627137874238626, ('u', 'm'): 0.001038275640582564, ('a', 'p'): 0.0018780419137145949, ('i', 'w'): 0.00019429473119892914, ('y', 't'): 0.0019421043847389708, ('s', 'r'): 0.0006576939870627526, ('p', 'v'): 4.214636251603669e-06, ('k', 'x'): 2.1073181258018347e-07, ('x', 'm'): 1.4751226880612841e-05, ('u', 'v'): 3.6245871763791556e-05, ('q', 'e'): 6.321954377405503e-07, ('t', 'k'): 0.00011885274229522346, ('a', 'k'): 0.0009630443834914384, ('w', 'd'): 0.00010473371085235117, ('v', 'r'): 8.429272503207338e-06, ('k', 'b'): 8.745370222077613e-05, ('x', 'v'): 2.5287817509622014e-06, ('g', 'b'): 0.0002543532977842814, ('j', 'y'): 4.2146362516036693e-07, ('y', 'd'): 0.0004661387694273658, ('c', 'u'): 0.0010100375776968193, ('e', 'm'): 0.0047098560111671, ('u', 'i'): 0.0008393448095068707, ('k', 'o'): 0.000307879178179648, ('g', 'o'): 0.0017117745135888302, ('r', 'r'): 0.0012066503588341305, ('o', 'u'): 0.007781272179523274, ('a', 'd'): 0.003735221377983752, ('t', 'e'): 0.009508430115430457, ('a', 'e'): 9.124687484721943e-05, ('e', 'v'): 0.0024162509630443834, ('c', 'q'): 3.4349285450569905e-05, ('c', 'f'): 5.184002589472513e-05, ('s', 'm'): 0.0014803909833757888, ('l', 'j'): 3.224196732476807e-05, ('h', 'r'): 0.0008473526183849177, ('d', 'c'): 0.0008250150462514182, ('b', 'd'): 2.023025400769761e-05, ('o', 'q'): 2.823806288574458e-05, ('o', 'f'): 0.008627781870657871, ('m', 'l'): 0.00011063420160459631, ('k', 'g'): 3.5613676326051e-05, ('i', 't'): 0.008865698087060898, ('g', 'g'): 0.00031778357337091664, ('m', 'w'): 0.00024529182984333356, ('m', 'n'): 0.00014961958693193025, ('u', 's'): 0.0036637832935190696, ('e', 'i'): 0.003961125881069709, ('v', 'm'): 5.6897589396649534e-06, ('l', 'z'): 5.6897589396649534e-06, ('z', 'd'): 1.0536590629009173e-06, ('z', 'e'): 0.00042757484772519224, ('x', 's'): 2.3391231196400363e-05, ('f', 'f'): 0.0013935694765927532, ('s', 'i'): 0.006303199246085868, ('r', 'm'): 0.0017705686892987014, ('d', 'u'): 0.001287571374864921, ('q', 'r'): 4.2146362516036693e-07, ('u', 'x'): 3.7299530826692474e-05, ('i', 'd'): 0.0028012579846283785, ('j', 'p'): 1.475122688061284e-06, ('p', 'b'): 6.321954377405503e-05, ('e', 's'): 0.013429516952109932, ('h', 'm'): 0.0003344313865647511, ('x', 'x'): 8.429272503207339e-07, ('v', 'i'): 0.0019043833902871179, ('n', 'a'): 0.0048778092657935064, ('d', 'q'): 5.289368495762605e-05, ('d', 'f'): 0.0010064551368829562, ('u', 'b'): 0.000717963285460685, ('h', 'v'): 3.687806720153211e-05, ('x', 'b'): 1.2643908754811006e-05, ('s', 's'): 0.004699108688725511, ('r', 'i'): 0.006045052775675143, ('t', 'r'): 0.0035042593113958705, ('a', 'r'): 0.008701116541435775, ('e', 'x'): 0.0014824983015015907, ('k', 'l'): 0.00015130544143257172, ('p', 'y'): 8.53463840949743e-05, ('g', 'l'): 0.0006220803107367016, ('v', 'j'): 1.0536590629009173e-06, ('k', 'w'): 0.0001563630049344961, ('c', 'o'): 0.0059913161634671955, ('g', 'w'): 0.00033927821825409534, ('u', 'y'): 5.3315148582786415e-05, ('v', 's'): 2.1494644883178712e-05, ('n', 'h'): 0.0011328942244310664, ('e', 'b'): 0.0020278722324591054, ('o', 'o'): 0.002456922202872359, ('x', 'y'): 2.4655622071881464e-05, ('l', 'n'): 0.0001871298495712029, ('z', 'r'): 2.318049938382018e-06, ('v', 'z'): 2.1073181258018347e-07, ('r', 's'): 0.00431894849883086, ('m', 'd'): 8.092101603079044e-05, ('c', 'g'): 1.9808790382537245e-05, ('o', 'g'): 0.0008873916627751525, ('h', 's'): 0.0005139748908830675, ('e', 'y'): 0.0016793218144514818, ('f', 'j'): 5.289368495762605e-05, ('t', 'm'): 0.0009624121880536979, ('a', 'm'): 0.002712118427906961, ('q', 'i'): 2.950245376122568e-06, ('w', 'i'): 0.003309543116571781, ('j', 'h'): 3.1609771887027516e-06, ('t', 'v'): 9.567224291140329e-05, ('s', 'y'): 0.0005177680635095107, ('f', 'z'): 3.7931726264433023e-06, ('d', 'o'): 0.0030317985875910995, ('l', 'p'): 0.0005666578440281133, ('k', 't'): 0.00031146161899351114, ('g', 't'): 0.001563208585719801, ('p', 'l'): 0.0020417805320893977, ('v', 'y'): 4.7836121455701644e-05, ('t', 'i'): 0.011056044547019325, ('a', 'i'): 0.0028965087639146216, ('n', 'c'): 0.0036867530610903095, ('h', 'b'): 0.00021073181258018345, ('l', 'k'): 0.0002623611066623284, ('w', 'j'): 1.5383422318353392e-05, ('d', 'g'): 0.0005793017527829243, ('b', 'i'): 0.000820168214562074, ('y', 'j'): 7.628491615402641e-05, ('r', 'y'): 0.0019454760937402536, ('k', 'd'): 4.5939535142479993e-05, ('g', 'd'): 0.00016753179100124585, ('w', 'z'): 1.0536590629009173e-06, ('z', 'i'): 0.00011021273797943595, ('c', 'w'): 4.7625389643121464e-05, ('c', 'n'): 2.9502453761225683e-05, ('l', 'e'): 0.006952253228832832, ('h', 'y'): 0.00041556313440812176, ('t', 's'): 0.003844380456900287, ('a', 's'): 0.008173654814547576, ('o', 'w'): 0.0032378943002945187, ('y', 'z'): 1.3486836005131742e-05, ('n', 'u'): 0.0007889799063002068, ('o', 'n'): 0.01315240461856699, ('b', 'j'): 0.00013528982367647777, ('p', 'a'): 0.0026004305672394637, ('j', 'c'): 2.318049938382018e-06, ('n', 'q'): 6.279808014889467e-05, ('u', 'a'): 0.0010123556276352013, ('n', 'f'): 0.0010736785850960348, ('z', 'j'): 4.2146362516036693e-07, ('t', 'x'): 4.2146362516036693e-07, ('b', 'z'): 2.1073181258018347e-07, ('j', 'm'): 1.2643908754811007e-06, ('f', 'n'): 0.00015720593218481686, ('x', 'a'): 0.00021895035327081062, ('p', 't'): 0.0009126794802847745, ('v', 'p'): 3.582440813863119e-06, ('z', 'z'): 7.375613440306422e-05, ('t', 'b'): 0.0009034072805312465, ('j', 'v'): 2.1073181258018347e-07, ('u', 't'): 0.0035624212916680015, ('d', 'l'): 0.0008233291917507767, ('i', 'j'): 1.896586313221651e-05, ('j', 'u'): 0.0005181895271346712, ('d', 'w'): 0.0012913645474913642, ('x', 't'): 0.0003493933452579442, ('u', 'h'): 7.733857521692732e-05, ('e', 'a'): 0.00977500585834439, ('i', 'z'): 0.0004969056140640726, ('x', 'h'): 3.8353189889593385e-05, ('w', 'n'): 0.0007830794155479617, ('t', 'y'): 0.0018247267651318084, ('a', 'y'): 0.0021174332528056832, ('s', 'a'): 0.006170016740535192, ('f', 'p'): 0.00035381871332212803, ('l', 'r'): 0.00034981480888310454, ('m', 'i'): 0.0028216989704486564, ('y', 'n'): 0.000334220654752171, ('c', 'd'): 5.60546621463288e-05, ('c', 'e'): 0.004846831689344219, ('e', 'h'): 0.0023186821338197585, ('f', 'k'): 2.9502453761225683e-05, ('o', 'd'): 0.0018776204500894347, ('o', 'e'): 0.0006094364019818906, ('s', 'h'): 0.004068388373673021, ('q', 'p'): 8.429272503207339e-07, ('n', 'o'): 0.005052927402047639, ('b', 'n'): 7.164881627726238e-06, ('r', 'a'): 0.006453451028455538, ('m', 'j'): 2.212684032091926e-05, ('w', 'p'): 7.691711159176696e-05, ('f', 'd'): 0.00022843328483691886, ('f', 'e'): 0.0020453629729032608, ('v', 'h'): 2.950245376122568e-06, ('u', 'c'): 0.0013931480129675928, ('h', 'a'): 0.008812593670290692, ('y', 'p'): 0.0006045895702925464, ('l', 'm'): 0.0004861582916224832, ('m', 'z'): 1.475122688061284e-06, ('w', 'k'): 1.896586313221651e-05, ('n', 'g'): 0.008301147561158587, ('x', 'c'): 0.00021178547164308438, ('j', 'b'): 2.5287817509622014e-06, ('l', 'v'): 0.0002912313649858135, ('r', 'h'): 0.000879805317522266, ('i', 'n'): 0.01888430992074798, ('d', 'd'): 0.0009723165832449664, ('y', 'k'): 6.343027558663523e-05, ('h', 't'): 0.0023205787201329804, ('p', 'u'): 0.0007974091788034141, ('j', 'o'): 0.0004598168150499603, ('b', 'p'): 1.095805425416954e-05, ('h', 'h'): 0.00039807239396396656, ('e', 'c'): 0.00598499420908979, ('u', 'u'): 1.3697567817711925e-05, ('w', 'e'): 0.003052450305223957, ('l', 'i'): 0.0052872611776368025, ('z', 'p'): 2.1073181258018346e-06, ('c', 'r'): 0.0011739869278842021, ('p', 'q'): 2.1073181258018346e-06, ('p', 'f'): 6.933076633888036e-05, ('b', 'k'): 1.475122688061284e-06, ('x', 'u'): 3.0134649198966235e-05, ('y', 'e'): 0.001230252321843111, ('o', 'r'): 0.010105011876844957, ('s', 'c'): 0.0022683172306130948, ('u', 'q'): 2.318049938382018e-06, ('u', 'f'): 0.00017132496362768916, ('k', 'j'): 1.5804885943513758e-05, ('g', 'j'): 4.0039044390234856e-05, ('z', 'k'): 3.1609771887027516e-06, ('x', 'q'): 1.475122688061284e-06, ('i', 'p'): 0.0007183847490858454, ('x', 'f'): 2.023025400769761e-05, ('e', 'u'): 0.000823539923563357, ('v', 'c'): 4.003904439023485e-06, ('t', 'a'): 0.006159058686281022, ('a', 'a'): 0.00019829863563795264, ('l', 's'): 0.0015638407811575414, ('k', 'z'): 2.1073181258018347e-07, ('b', 'e'): 0.004722921383547071, ('f', 'r'): 0.0018651872731472038, ('g', 'z'): 1.8965863132216511e-06, ('n', 'l'): 0.0009036180123438266, ('s', 'v'): 0.00017258935450317024, ('i', 'k'): 0.0005110246455069449, ('n', 'w'): 0.0010958054254169539, ('e', 'q'): 0.00046424218311414415, ('s', 'u'): 0.0025357359007773476, ('e', 'f'): 0.0032442162546719245, ('r', 'c'): 0.0014669041473706571, ('l', 'x'): 2.1073181258018347e-07, ('v', 'v'): 1.8965863132216511e-06, ('h', 'c'): 0.00031251527805641207, ('t', 'h'): 0.029684526047294962, ('a', 'h'): 0.00034117480456731704, ('s', 'q'): 0.0001310751874248741, ('s', 'f'): 0.0013263460283796746, ('v', 'u'): 2.0440985820277794e-05, ('i', 'e'): 0.002821488238636076, ('w', 'r'): 0.00030998649630544986, ('r', 'v'): 0.000560546621463288, ('j', 'l'): 6.321954377405503e-07, ('r', 'u'): 0.0011143498249240101, ('f', 'm'): 0.00038142458077013207, ('c', 'i'): 0.001950533657242178, ('y', 'r'): 0.00044780510173288987, ('m', 'p'): 0.0017429628218506973, ('p', 'o'): 0.0027489964951084933, ('z', 'h'): 5.47902712708477e-06, ('o', 'i'): 0.001039540031458045, ('h', 'u'): 0.0006825603409472142, ('u', 'o'): 0.00010368005178945026, ('r', 'q'): 3.05561128241266e-05, ('l', 'y'): 0.003730796009919568, ('q', 'c'): 6.321954377405503e-07, ('r', 'f'): 0.0007542091572244765, ('n', 't'): 0.012121083127799573, ('m', 'k'): 1.3486836005131742e-05, ('x', 'o'): 5.1629294082144944e-05, ('b', 'r'): 0.0009057253304696285, ('k', 'n'): 0.0005141856226956477, ('g', 'n'): 0.0005691866257790755, ('h', 'q'): 1.3908299630292108e-05, ('p', 'g'): 1.7280008631575042e-05, ('h', 'f'): 0.00019640204932473097, ('c', 'j'): 4.425368064183853e-06, ('q', 'm'): 2.1073181258018347e-07, ('f', 'i'): 0.002640048148004538, ('c', 's'): 0.0002750050154171394, ('s', 'x'): 3.582440813863119e-06, ('o', 'j'): 9.124687484721943e-05, ('w', 'm'): 0.00011800981504490273, ('u', 'g'): 0.0011741976596967823, ('o', 's'): 0.0030020854020172934, ('j', 'a'): 0.00020693863995374016, ('q', 'v'): 2.1073181258018347e-07, ('e', 'o'): 0.0035971920407437317, ('c', 'z'): 4.003904439023485e-06, ('t', 'c'): 0.0010589273582154218, ('n', 'd'): 0.010770713672785757, ('a', 'c'): 0.004049843974165966, ('m', 'e'): 0.006361571958170578, ('s', 'b'): 0.0011881059593270742, ('y', 'm'): 0.0006633837460024175, ('x', 'g'): 5.268295314504587e-06, ('w', 'v'): 1.3486836005131742e-05, ('o', 'z'): 4.235709432861687e-05, ('i', 'r'): 0.0025515407867208613, ('j', 't'): 1.475122688061284e-06, ('y', 'v'): 7.291320715274347e-05, ('s', 'o'): 0.005745602869998702, ('f', 's'): 0.0005854129753477496, ('v', 'b'): 4.636099876764036e-06, ('r', 'x'): 4.214636251603669e-06, ('k', 'p'): 5.563319852116843e-05, ('e', 'g'): 0.001753920876104867, ('g', 'p'): 0.00024107719359172988, ('z', 'c'): 4.425368064183853e-06}
 
 def clean_text(text):
     text = text.strip().lower()
@@ -46,12 +100,14 @@ def bigram_freq(bigrams, text):
     return outdict
 
 #Fitness function calculates fitness score based on product of bigram probabilities
-def bigram_fitness(ciphertext):
+#Reference implementation kept for cross-checking the vectorized engine below
+def bigram_fitness_reference(ciphertext):
     try:
         ciphertext = clean_text(ciphertext)
         fitness = 0
         
-        bigrammed_text = list(bigrams(ciphertext))
+        bigrammed_text = list(zip(ciphertext, ciphertext[1:]))
+        bigramdict = bigram_dict()
         
         cipher_bg_freqs = bigram_freq(list(bigramdict.keys()), bigrammed_text)
         # Removed verbose debug print for cleaner output
@@ -64,6 +120,556 @@ def bigram_fitness(ciphertext):
     except ZeroDivisionError:
         raise Exception('Please enter text')
 
+
+# Vectorized scoring engine. The bigram table is a dense 26x26 array indexed by
+# letter code; its mask marks the pairs present in the table so missing pairs
+# are ignored exactly like the reference version.
+
+# Lookup table from byte value to letter code, 255 for characters to drop
+_BYTE_CODES = np.full(256, 255, dtype=np.uint8)
+_BYTE_CODES[np.frombuffer(ALPHABET.encode(), dtype=np.uint8)] = np.arange(26)
+_BYTE_CODES[np.frombuffer(ALPHABET.upper().encode(), dtype=np.uint8)] = np.arange(26)
+
+
+def encode_bytes(data):
+    """Letter codes of the ASCII letters in a bytes-like object"""
+    raw = _BYTE_CODES[np.frombuffer(data, dtype=np.uint8)]
+    return raw[raw != 255]
+
+
+def encode_text(text):
+    """Encode text as a uint8 array of letter codes, dropping non-letters"""
+    if text.isascii():
+        return encode_bytes(text.encode('ascii'))
+    # Slow path: keep every alphabetic character like clean_text does
+    codes = [ALPHABET.find(c) for c in clean_text(text)]
+    return np.array([OTHER_LETTER if c < 0 else c for c in codes], dtype=np.uint8)
+
+
+def bigram_counts(codes):
+    """Count bigrams of an encoded text into a 26x26 matrix in one bincount pass"""
+    codes = np.asarray(codes, dtype=np.intp)
+    pairs = codes[:-1] * 27 + codes[1:]
+    counts = np.bincount(pairs, minlength=27 * 27).reshape(27, 27)
+    return counts[:26, :26]
+
+
+def bigram_fitness_from_counts(counts, total):
+    """L1 distance between observed bigram counts and the English table"""
+    if total <= 0:
+        raise Exception('Please enter text')
+    matrix, mask = bigram_table()
+    diff = np.abs(matrix - counts / total)
+    return float(diff[mask].sum())
+
+
+def bigram_fitness(ciphertext):
+    """Vectorized bigram fitness, same score as bigram_fitness_reference"""
+    codes = encode_text(ciphertext)
+    return bigram_fitness_from_counts(bigram_counts(codes), len(codes) - 1)
+
+def decode_codes(codes):
+    """Inverse of encode_text for letter codes 0-25, as uppercase text"""
+    return (np.asarray(codes, dtype=np.uint8) + 65).tobytes().decode('ascii')
+
+
+def score_batch(candidates, ciphertext=None, fitness=None):
+    """Score many equal-length candidate plaintexts in one vectorized pass.
+
+    candidates is a 2-D array of letter codes (one candidate per row), or,
+    when ciphertext is given, a list of 26-letter substitution keys that are
+    applied to it. Returns an array of fitness scores, one per candidate.
+    """
+    if ciphertext is not None:
+        keys = np.array([encode_text(key) for key in candidates], dtype=np.uint8)
+        # Letters outside a-z decrypt to themselves
+        keys = np.concatenate((keys, np.full((len(keys), 1), OTHER_LETTER, dtype=np.uint8)), axis=1)
+        candidates = keys[:, encode_text(ciphertext)]
+    candidates = np.atleast_2d(np.asarray(candidates, dtype=np.uint8))
+
+    if fitness is not None and fitness is not bigram_fitness:
+        if hasattr(fitness, 'score_batch'):
+            return fitness.score_batch(candidates)
+        return np.array([fitness(decode_codes(row)) for row in candidates])
+
+    batch, length = candidates.shape
+    if length < 2:
+        raise Exception('Please enter text')
+    # Give every row its own block of 27x27 bins so one bincount counts them
+    # all; as in bigram_counts, pairs with OTHER_LETTER are counted, then dropped
+    pairs = candidates[:, :-1].astype(np.intp) * 27 + candidates[:, 1:]
+    pairs += np.arange(batch)[:, None] * 729
+    counts = np.bincount(pairs.ravel(), minlength=batch * 729).reshape(batch, 27, 27)
+    counts = counts[:, :26, :26].reshape(batch, 676)
+    matrix, mask = bigram_table()
+    diff = np.abs(matrix.ravel() - counts / (length - 1))
+    return diff[:, mask.ravel()].sum(axis=1)
+
+
+# Letters per score_batch call when scoring a whole swap neighbourhood
+BATCH_LETTERS = 1 << 22
+
+
+def swap_pairs(size):
+    """All position pairs i < j of a key of the given size, as a (k, 2) array"""
+    return np.transpose(np.triu_indices(size, 1))
+
+
+def pick_swap(deltas, improvement='best'):
+    """Index of the swap to apply given every swap's score change, or None.
+
+    'best' takes the largest improvement, 'first' the first improving swap
+    in random order, which is the batched form of first-improvement.
+    """
+    improving = np.flatnonzero(deltas < -BOUND_TOLERANCE)
+    if len(improving) == 0:
+        return None
+    if improvement == 'first':
+        return int(improving[random.randrange(len(improving))])
+    return int(improving[np.argmin(deltas[improving])])
+
+
+# Letters decoded and scored per step by bounded_score
+BOUND_CHUNK_SIZE = 1024
+# Slack so rounding in the lower bound never rejects a candidate that the
+# full score would have accepted
+BOUND_TOLERANCE = 1e-12
+
+
+def acceptance_cutoff(current_score, temp, u):
+    """Score a candidate must stay below to pass the annealing rule.
+
+    delta < 0 or u < exp(-delta / temp) is the same test as
+    new_score < current_score - temp * ln(u) for a pre-drawn u in [0, 1).
+    """
+    if temp <= 0:
+        return current_score
+    if u <= 0:
+        return float('inf')
+    return current_score - temp * math.log(u)
+
+
+def bounded_score(fitness, chunks, length, cutoff, stats=None):
+    """Score a text given as encoded chunks, stopping once it cannot pass cutoff.
+
+    Returns the exact score, or inf as soon as the counts seen so far prove
+    the final score is at least cutoff. length is the letter count of the
+    whole text. stats, if given, accumulates 'scored' and 'skipped' letters.
+    """
+    if fitness is not None and fitness is not bigram_fitness:
+        if hasattr(fitness, 'bounded_score'):
+            return fitness.bounded_score(chunks, length, cutoff, stats)
+        # No bound available for this scorer: score the whole text
+        codes = np.concatenate(list(chunks))
+        _count_scored(stats, len(codes), length)
+        return fitness(decode_codes(codes))
+
+    matrix, mask = bigram_table()
+    total = length - 1
+    reference = matrix[mask]
+    counts = np.zeros(27 * 27, dtype=np.int64)
+    seen = 0
+    previous = np.zeros(0, dtype=np.intp)
+    for chunk in chunks:
+        codes = np.concatenate((previous, chunk.astype(np.intp)))
+        counts += np.bincount(codes[:-1] * 27 + codes[1:], minlength=27 * 27)
+        seen += len(chunk)
+        previous = codes[-1:]
+        if seen >= length:
+            break
+        # Counts only grow: cells already above the reference stay at least that
+        # far off, and the remaining bigrams can close at most that much deficit
+        diff = counts.reshape(27, 27)[:26, :26][mask] / total - reference
+        excess = diff[diff > 0].sum()
+        deficit = -diff[diff < 0].sum()
+        remaining = (length - seen) / total
+        if excess + max(0.0, deficit - remaining) > cutoff + BOUND_TOLERANCE:
+            _count_scored(stats, seen, length)
+            return float('inf')
+    _count_scored(stats, seen, length)
+    return bigram_fitness_from_counts(counts.reshape(27, 27)[:26, :26], total)
+
+
+def _count_scored(stats, scored, length):
+    if stats is not None:
+        stats['scored'] = stats.get('scored', 0) + scored
+        stats['skipped'] = stats.get('skipped', 0) + length - scored
+
+
+def skip_report(stats):
+    """Summary of how much text bounded scoring skipped"""
+    scored, skipped = stats.get('scored', 0), stats.get('skipped', 0)
+    total = scored + skipped
+    return {
+        'chars_scored': scored,
+        'chars_skipped': skipped,
+        'skipped_fraction': skipped / total if total else 0.0
+    }
+
+
+def sample_window(items, size, segments=8):
+    """Evenly spaced contiguous segments of a text (or list) totalling ~size"""
+    if size is None or size >= len(items):
+        return items
+    length = max(1, size // segments)
+    starts = np.linspace(0, len(items) - length, segments).astype(int)
+    parts = [items[start:start + length] for start in starts]
+    if isinstance(items, str):
+        return ''.join(parts)
+    return [item for part in parts for item in part]
+
+
+class SampleSchedule:
+    """Progressive-resolution scoring window for long texts.
+
+    stages is a list of (fraction of iterations done, window size). Texts
+    shorter than min_length always use the full text. The best keys seen are
+    kept so they can be re-scored when the window grows and at the end.
+    """
+
+    def __init__(self, items, iterations, stages, min_length, segments=8, verify_top=5):
+        self.items = items
+        self.segments = segments
+        self.verify_top = verify_top
+        self.active = len(items) >= min_length
+        if self.active:
+            self.stages = [(int(fraction * iterations), size) for fraction, size in stages]
+        else:
+            self.stages = [(0, None)]
+        self.stage = 0
+        self.top = {}
+
+    def window(self):
+        return sample_window(self.items, self.stages[self.stage][1], self.segments)
+
+    def advance(self, iteration):
+        """Move to the next stage once its start is reached; True if it changed"""
+        if self.stage + 1 < len(self.stages) and iteration >= self.stages[self.stage + 1][0]:
+            self.stage += 1
+            return True
+        return False
+
+    def record(self, key, score):
+        """Remember a best key with its score on the current window"""
+        if not self.active:
+            return
+        self.top[key] = score
+        if len(self.top) > self.verify_top:
+            del self.top[max(self.top, key=self.top.get)]
+
+    def rescore(self, score_key):
+        """Re-score the remembered keys with score_key(key); returns the best"""
+        self.top = {key: score_key(key) for key in self.top}
+        key = min(self.top, key=self.top.get)
+        return key, self.top[key]
+
+
+class StoppingController:
+    """Convergence check for an annealing chain.
+
+    update() is called once per iteration with the chain's best score since
+    its last restart. Reaching target stops the chain at once. Every window
+    iterations the best-score gain and acceptance rate of that window are
+    checked; a stagnant chain is restarted while restarts remain and ended
+    after that. Decisions are logged for the result dict.
+    """
+
+    def __init__(self, target=None, window=2000, min_improvement=1e-4,
+                 max_acceptance=0.01, restarts=0):
+        self.target = target
+        self.window = window
+        self.min_improvement = min_improvement
+        self.max_acceptance = max_acceptance
+        self.restarts = restarts
+        self.restarts_used = 0
+        self.decisions = []
+        self.reset()
+
+    def reset(self):
+        """Start a fresh window, e.g. after a restart or a rescoring"""
+        self.window_best = float('inf')
+        self.seen = 0
+        self.accepted = 0
+
+    def update(self, iteration, best_score, accepted):
+        """None to carry on, else 'target', 'restart' or 'stagnant' (end)"""
+        self.seen += 1
+        self.accepted += accepted
+        if self.target is not None and best_score <= self.target:
+            return self.record('target', iteration, best_score)
+        if self.seen < self.window:
+            return None
+        gain = self.window_best - best_score
+        acceptance = self.accepted / self.seen
+        self.window_best = best_score
+        self.seen = self.accepted = 0
+        if gain >= self.min_improvement or acceptance > self.max_acceptance:
+            return None
+        if self.restarts_used < self.restarts:
+            self.restarts_used += 1
+            self.reset()
+            return self.record('restart', iteration, best_score, acceptance)
+        return self.record('stagnant', iteration, best_score, acceptance)
+
+    def state(self):
+        """Progress of the chain, for a checkpoint"""
+        return {name: getattr(self, name)
+                for name in ('restarts_used', 'decisions', 'window_best', 'seen', 'accepted')}
+
+    def restore(self, state):
+        self.__dict__.update(state)
+
+    def record(self, decision, iteration, score, acceptance=None):
+        """Log a decision, including ones made outside update()"""
+        entry = {'decision': decision, 'iteration': iteration, 'score': score}
+        if acceptance is not None:
+            entry['acceptance'] = acceptance
+        self.decisions.append(entry)
+        return decision
+
+    def report(self, iterations):
+        """Summary for the result dict; iterations is how many actually ran"""
+        ended = [d['decision'] for d in self.decisions if d['decision'] != 'restart']
+        return {
+            'stopped_by': ended[-1] if ended else 'max_iterations',
+            'iterations': iterations,
+            'restarts': self.restarts_used,
+            'decisions': self.decisions,
+        }
+
+
+class BigramScoreState:
+    """Incremental bigram fitness for substitution keys.
+
+    Holds the plaintext bigram-count matrix implied by the current key so a
+    swap of two key letters can be scored in O(26) without decrypting the text.
+    key[i] is the plaintext letter for ciphertext letter i (same convention as
+    SubstitutionCracker.decrypt_with_key).
+    """
+
+    def __init__(self, cipher_counts, total, key):
+        if total <= 0:
+            raise Exception('Please enter text')
+        self.total = total
+        self.key = np.array([ALPHABET.find(c.lower()) for c in key], dtype=np.intp)
+        self.counts = np.zeros((26, 26))
+        self.counts[np.ix_(self.key, self.key)] = cipher_counts
+        matrix, mask = bigram_table()
+        self._target = matrix * total
+        self._weights = mask.astype(float)
+        self._identity = np.arange(26)
+        self._refresh()
+
+    @classmethod
+    def from_text(cls, ciphertext, key):
+        codes = encode_text(ciphertext)
+        return cls(bigram_counts(codes), len(codes) - 1, key)
+
+    def _refresh(self):
+        self._errors = self._weights * np.abs(self._target - self.counts)
+        self.score = float(self._errors.sum()) / self.total
+
+    def swap_delta(self, i, j, cutoff=None):
+        """Fitness change if key positions i and j were swapped (always exact)"""
+        p, q = int(self.key[i]), int(self.key[j])
+        if p == q:
+            return 0.0
+        pq = np.array((p, q))
+        idx = self._identity.copy()
+        idx[p], idx[q] = q, p
+
+        # Swapping plaintext letters p and q swaps rows p/q and columns p/q of
+        # the count matrix; only those cells change. The 2x2 block where they
+        # cross belongs to the rows and is zeroed out of the columns.
+        rows = self.counts.take(idx[pq], 0).take(idx, 1)
+        cols = self.counts.take(idx[pq], 1).take(idx, 0)
+        row_change = (self._weights.take(pq, 0) * np.abs(self._target.take(pq, 0) - rows)
+                      - self._errors.take(pq, 0))
+        col_change = (self._weights.take(pq, 1) * np.abs(self._target.take(pq, 1) - cols)
+                      - self._errors.take(pq, 1))
+        col_change[pq] = 0
+        return float(row_change.sum() + col_change.sum()) / self.total
+
+    def all_swap_deltas(self):
+        """Fitness change of every swap of two key positions in one pass.
+
+        Returns (pairs, deltas): pairs is the (325, 2) array of positions
+        from swap_pairs and deltas the matching swap_delta values.
+        """
+        pairs = swap_pairs(26)
+        pq = self.key[pairs]
+        swaps = np.arange(len(pairs))
+        idx = np.tile(self._identity, (len(pairs), 1))
+        idx[swaps, pq[:, 0]] = pq[:, 1]
+        idx[swaps, pq[:, 1]] = pq[:, 0]
+
+        # Same cell bookkeeping as swap_delta, for all swaps at once
+        source = idx[swaps[:, None], pq]
+        rows = self.counts[source[:, :, None], idx[:, None, :]]
+        cols = self.counts[idx[:, :, None], source[:, None, :]]
+        row_change = (self._weights[pq] * np.abs(self._target[pq] - rows)
+                      - self._errors[pq])
+        col_change = (self._weights[:, pq].transpose(1, 0, 2)
+                      * np.abs(self._target[:, pq].transpose(1, 0, 2) - cols)
+                      - self._errors[:, pq].transpose(1, 0, 2))
+        col_change[swaps[:, None], pq] = 0
+        deltas = row_change.sum(axis=(1, 2)) + col_change.sum(axis=(1, 2))
+        return pairs, deltas / self.total
+
+    def commit_swap(self, i, j, score=None):
+        """Apply the swap of key positions i and j.
+
+        Only rows and columns p and q of the error matrix are updated. score,
+        the new fitness (current score plus the swap's delta), saves summing
+        the whole matrix; without it the score is recomputed.
+        """
+        p, q = int(self.key[i]), int(self.key[j])
+        self.key[[i, j]] = self.key[[j, i]]
+        if p == q:
+            return
+        pq = [p, q]
+        self.counts[pq] = self.counts[[q, p]]
+        self.counts[:, pq] = self.counts[:, [q, p]]
+        self._errors[pq] = self._weights[pq] * np.abs(self._target[pq] - self.counts[pq])
+        self._errors[:, pq] = self._weights[:, pq] * np.abs(self._target[:, pq] - self.counts[:, pq])
+        self.score = float(self._errors.sum()) / self.total if score is None else float(score)
+
+    def key_string(self):
+        return ''.join(ALPHABET[c] for c in self.key).upper()
+
+    def swapped_key(self, i, j):
+        """Key string that commit_swap(i, j) would produce"""
+        key = list(self.key_string())
+        key[i], key[j] = key[j], key[i]
+        return ''.join(key)
+
+
+class TextScoreState:
+    """BigramScoreState interface for arbitrary fitness functions.
+
+    Used when the scorer cannot be updated incrementally: every proposed swap
+    decrypts the text and rescores it, as the annealers originally did.
+    """
+
+    def __init__(self, ciphertext, key, fitness, stats=None):
+        self.ciphertext = ciphertext
+        self.fitness = fitness
+        self.stats = stats
+        self.key = list(key.upper())
+        self.score = fitness(self._decrypt(self.key))
+        self._proposal = None
+
+    def _decrypt(self, key, text=None):
+        text = self.ciphertext if text is None else text
+        return text.translate(str.maketrans(ALPHABET.upper(), ''.join(key)))
+
+    def _chunks(self, key):
+        for start in range(0, len(self.ciphertext), BOUND_CHUNK_SIZE):
+            yield encode_text(self._decrypt(key, self.ciphertext[start:start + BOUND_CHUNK_SIZE]))
+
+    def swap_delta(self, i, j, cutoff=None):
+        """Score change of a swap; inf if it provably cannot score below cutoff"""
+        key = self.key.copy()
+        key[i], key[j] = key[j], key[i]
+        if cutoff is None:
+            score = self.fitness(self._decrypt(key))
+        else:
+            score = bounded_score(self.fitness, self._chunks(key), len(self.ciphertext), cutoff, self.stats)
+            if score == float('inf'):
+                return score
+        self._proposal = (i, j, score)
+        return score - self.score
+
+    def all_swap_deltas(self):
+        """Score change of every swap of two key positions, batch-scored"""
+        pairs = swap_pairs(len(self.key))
+        keys = [self.swapped_key(i, j) for i, j in pairs]
+        step = max(1, BATCH_LETTERS // max(len(self.ciphertext), 1))
+        scores = np.concatenate([score_batch(keys[start:start + step], self.ciphertext, self.fitness)
+                                 for start in range(0, len(keys), step)])
+        return pairs, scores - self.score
+
+    def commit_swap(self, i, j, score=None):
+        if score is None and self._proposal and self._proposal[:2] == (i, j):
+            score = self._proposal[2]
+        elif score is None:
+            score = self.score + self.swap_delta(i, j)
+        self.key[i], self.key[j] = self.key[j], self.key[i]
+        self.score = score
+        self._proposal = None
+
+    def key_string(self):
+        return ''.join(self.key)
+
+    def swapped_key(self, i, j):
+        key = self.key.copy()
+        key[i], key[j] = key[j], key[i]
+        return ''.join(key)
+
+
+class ScoreCache:
+    """Size-bounded LRU cache from key to score for a single ciphertext.
+
+    max_bytes caps the approximate memory used by the entries; once it is
+    reached the least recently used keys are evicted. Hit and miss counters
+    are kept so callers can judge whether the cache pays off.
+    """
+
+    # Approximate per-entry cost of the OrderedDict slot and the float score
+    ENTRY_OVERHEAD = 100 + sys.getsizeof(0.0)
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.ciphertext = None
+
+    def bind(self, ciphertext):
+        """Scope the cache to ciphertext, dropping entries for any other text"""
+        if ciphertext != self.ciphertext:
+            self.entries.clear()
+            self.size = 0
+            self.ciphertext = ciphertext
+
+    def get(self, key):
+        score = self.entries.get(key)
+        if score is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return score
+
+    def put(self, key, score):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+        else:
+            self.size += sys.getsizeof(key) + self.ENTRY_OVERHEAD
+        self.entries[key] = score
+        while self.size > self.max_bytes and self.entries:
+            old_key, _ = self.entries.popitem(last=False)
+            self.size -= sys.getsizeof(old_key) + self.ENTRY_OVERHEAD
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self.entries),
+            'bytes': self.size
+        }
+
+
+def score_state(ciphertext, key, fitness=None, stats=None):
+    """Incremental state when the scorer supports it, full rescoring otherwise"""
+    if fitness is None or fitness is bigram_fitness:
+        return BigramScoreState.from_text(ciphertext, key)
+    return TextScoreState(ciphertext, key, fitness, stats)
+
+
 def decrypt_text(key, ciphertext):
     alphabet = 'abcdefghijklmnopqrstuvwxyz'
     return(''.join(key[alphabet.index(i)] for i in ciphertext if i.isalpha()))
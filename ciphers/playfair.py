@@ -1,17 +1,27 @@
 import string
 import random
 import math
-from cipher_utils import bigram_fitness
+import itertools
+from collections import Counter
+import numpy as np
+from cipher_utils import (bigram_fitness, ScoreCache, SampleSchedule, StoppingController,
+                          BOUND_CHUNK_SIZE, BATCH_LETTERS,
+                          acceptance_cutoff, bounded_score, encode_text, decode_codes, score_batch,
+                          swap_pairs, pick_swap)
+from checkpoint import run_checkpoint, fitness_name
 from config import *
 import time
-from multiprocessing import Value, Array
-import ctypes
 
 class PlayfairCracker:
+    MODES = ('anneal', 'steepest')
+
     def __init__(self):
         self.running = True
+        self.mode = 'anneal'
         self.LETTERS = string.ascii_uppercase.replace('J', '')  # Remove J for Playfair
         self.progress_callback = None
+        self.fitness_function = bigram_fitness
+        self.score_cache = ScoreCache(SCORE_CACHE_MAX_BYTES) if SCORE_CACHE_MAX_BYTES else None
         self.temperature = INITIAL_TEMPERATURE
         self.cooling_rate = COOLING_RATE
         self.iterations = MAX_ITERATIONS
@@ -19,24 +29,21 @@ class PlayfairCracker:
         self.best_score = float('inf')
         self.best_text = ""
         self.best_key = ""
-        self.shared_score = Value(ctypes.c_double, float('inf'))
-        self.shared_text = Array(ctypes.c_char, 1000)
-        self.shared_key = Array(ctypes.c_char, 26)
+        self.bounded_scoring = BOUNDED_SCORING
+        self.bounded_stats = {}
+        self.status = None  # StatusBoard for the best result so far
+        self.target_fitness = PLAYFAIR_TARGET_FITNESS
+        self.stopping = None  # Report of the adaptive stopping decisions
+        self.move_weights = None  # (letters, cumulative weights) for the first swap pick
+        self.proposal_stats = None
+        self._pairs_text = None
+        self._pairs = []
+        self.sample_pairs = None  # Digraphs scored instead of the full text
 
     def create_key_matrix(self, key):
         """Convert key string to 5x5 matrix"""
-        matrix = []
-        used = set()
-        # First fill with key letters
-        for c in key:
-            if c not in used and c in self.LETTERS:
-                used.add(c)
-        # Then add remaining alphabet
-        for c in self.LETTERS:
-            if c not in used:
-                used.add(c)
-        # Create 5x5 matrix
-        matrix = list(used)
+        # Key letters first, then the remaining alphabet, keeping their order
+        matrix = list(dict.fromkeys(c for c in key + self.LETTERS if c in self.LETTERS))
         return [matrix[i:i+5] for i in range(0, 25, 5)]
 
     def find_position(self, matrix, char):
@@ -68,54 +75,125 @@ class PlayfairCracker:
             print(f"Error decrypting pair {pair}: {str(e)}")
             return 'XX'  # Return placeholder on error
 
+    def prepare_pairs(self, ciphertext):
+        """Split ciphertext into the digraphs to decrypt (independent of the key)"""
+        if ciphertext == self._pairs_text:
+            return self._pairs
+        # Pre-process ciphertext to ensure valid pairs
+        processed_text = []
+        i = 0
+        while i < len(ciphertext):
+            if i + 1 >= len(ciphertext):
+                processed_text.append(ciphertext[i] + 'X')
+                i += 1
+            else:
+                if ciphertext[i] == ciphertext[i + 1]:
+                    processed_text.append(ciphertext[i] + 'X')
+                    i += 1
+                else:
+                    processed_text.append(ciphertext[i:i+2])
+                    i += 2
+        self._pairs_text = ciphertext
+        self._pairs = processed_text
+        return processed_text
+
+    def decrypt_pairs(self, matrix, pairs):
+        """Decrypt a list of digraphs with a key matrix"""
+        result = []
+        for pair in pairs:
+            try:
+                if len(pair) == 2 and pair[0].isalpha() and pair[1].isalpha():
+                    decrypted_pair = self.decrypt_pair(matrix, pair)
+                    result.append(decrypted_pair)
+                else:
+                    result.append('XX')  # Invalid pair placeholder
+            except Exception as e:
+                print(f"Error processing pair {pair}: {str(e)}")
+                result.append('XX')
+        return ''.join(result)
+
     def decrypt_with_key(self, ciphertext, key):
         """Decrypt entire text using key"""
         try:
             matrix = self.create_key_matrix(key)
-            result = []
-            
-            # Pre-process ciphertext to ensure valid pairs
-            processed_text = []
-            i = 0
-            while i < len(ciphertext):
-                if i + 1 >= len(ciphertext):
-                    processed_text.append(ciphertext[i] + 'X')
-                    i += 1
-                else:
-                    if ciphertext[i] == ciphertext[i + 1]:
-                        processed_text.append(ciphertext[i] + 'X')
-                        i += 1
-                    else:
-                        processed_text.append(ciphertext[i:i+2])
-                        i += 2
-            
-            # Decrypt each valid pair
-            for pair in processed_text:
-                try:
-                    if len(pair) == 2 and pair[0].isalpha() and pair[1].isalpha():
-                        decrypted_pair = self.decrypt_pair(matrix, pair)
-                        result.append(decrypted_pair)
-                    else:
-                        result.append('XX')  # Invalid pair placeholder
-                except Exception as e:
-                    print(f"Error processing pair {pair}: {str(e)}")
-                    result.append('XX')
-                    
-            return ''.join(result)
+            return self.decrypt_pairs(matrix, self.prepare_pairs(ciphertext))
             
         except Exception as e:
             print(f"Error in decrypt_with_key: {str(e)}")
             return 'X' * len(ciphertext)  # Return placeholder text of same length
 
+    def scoring_pairs(self, ciphertext):
+        """Digraphs the annealer scores: the sample window when one is set"""
+        if self.sample_pairs is not None:
+            return self.sample_pairs
+        return self.prepare_pairs(ciphertext)
+
+    def decrypt_chunks(self, ciphertext, key, size=BOUND_CHUNK_SIZE):
+        """Decrypt lazily, yielding encoded plaintext chunks for bounded_score"""
+        matrix = self.create_key_matrix(key)
+        pairs = self.scoring_pairs(ciphertext)
+        step = max(1, size // 2)
+        for start in range(0, len(pairs), step):
+            yield encode_text(self.decrypt_pairs(matrix, pairs[start:start + step]))
+
+    def decrypt_batch(self, keys, pairs):
+        """Decrypt digraphs with many keys at once.
+
+        keys is a (k, 25) array of letter codes, each a full key square in
+        reading order. Every digraph is looked up in per-key tables of all
+        27x27 code pairs, so the result matches decrypt_pairs row for row as
+        a (k, 2 * len(pairs)) array of letter codes.
+        """
+        keys = np.asarray(keys, dtype=np.intp)
+        count = len(keys)
+        # Cell of every letter code in each square; J shares I's cell and
+        # anything else falls back to the first cell, as in find_position
+        cell = np.zeros((count, 27), dtype=np.intp)
+        cell[np.arange(count)[:, None], keys] = np.arange(25)
+        cell[:, 9] = cell[:, 8]
+        row, col = cell // 5, cell % 5
+        row1, col1 = row[:, :, None], col[:, :, None]
+        row2, col2 = row[:, None, :], col[:, None, :]
+        same_row = row1 == row2
+        same_col = ~same_row & (col1 == col2)
+        first = np.where(same_row, row1 * 5 + (col1 - 1) % 5,
+                         np.where(same_col, (row1 - 1) % 5 * 5 + col1, row1 * 5 + col2))
+        second = np.where(same_row, row2 * 5 + (col2 - 1) % 5,
+                          np.where(same_col, (row2 - 1) % 5 * 5 + col2, row2 * 5 + col1))
+
+        codes = encode_text(''.join(pairs)).reshape(-1, 2)
+        square = np.arange(count)[:, None]
+        plain = np.empty((count, 2 * len(codes)), dtype=np.uint8)
+        plain[:, 0::2] = keys[square, first[:, codes[:, 0], codes[:, 1]]]
+        plain[:, 1::2] = keys[square, second[:, codes[:, 0], codes[:, 1]]]
+        return plain
+
     def create_random_key(self):
         """Generate random initial key"""
         key = list(self.LETTERS)
         random.shuffle(key)
         return ''.join(key)
 
+    def letter_weights(self, pairs):
+        """Letters of the digraphs with cumulative weights by their share"""
+        counts = Counter(''.join(pairs).replace('J', 'I'))
+        letters = [c for c in self.LETTERS if counts[c]]
+        return letters, list(itertools.accumulate(counts[c] for c in letters))
+
     def swap_letters(self, key):
-        """Create new key by swapping two random positions"""
-        pos1, pos2 = random.sample(range(25), 2)
+        """Create new key by swapping two random positions.
+
+        With move_weights set, the first letter is drawn by its share of the
+        ciphertext and the second uniformly. Letters that never occur still
+        change the decryption through their cells, so they stay in play.
+        """
+        if self.move_weights:
+            letters, cum_weights = self.move_weights
+            pos1 = key.index(random.choices(letters, cum_weights=cum_weights)[0])
+            pos2 = random.randrange(24)
+            pos2 += pos2 >= pos1
+        else:
+            pos1, pos2 = random.sample(range(25), 2)
         key_list = list(key)
         key_list[pos1], key_list[pos2] = key_list[pos2], key_list[pos1]
         return ''.join(key_list)
@@ -123,41 +201,212 @@ class PlayfairCracker:
     def monte_carlo_optimization(self, ciphertext):
         """Optimize key using Monte Carlo with simulated annealing"""
         self.start_time = time.time()
+        self.bounded_stats = {}
+        # Long texts are annealed on a growing window of digraphs; the best
+        # keys are re-scored when it grows and verified on the full text
+        sampling = SampleSchedule(self.prepare_pairs(ciphertext), self.iterations,
+                                  [(fraction, size // 2) for fraction, size in SAMPLE_SCHEDULE],
+                                  SAMPLE_MIN_LENGTH // 2, SAMPLE_SEGMENTS, SAMPLE_VERIFY_TOP)
+        self.set_window(ciphertext, sampling)
         current_key = self.create_random_key()
-        current_score = bigram_fitness(self.decrypt_with_key(ciphertext, current_key))
+        current_score, current_text = self.score_key(ciphertext, current_key)
         self.best_key = current_key
         self.best_score = current_score
+        self.best_text = self.preview_text(ciphertext, current_key, current_text)
+        sampling.record(current_key, current_score)
         temp = self.temperature
+        # Stops on the target score, restarts or ends the chain on stagnation
+        controller = StoppingController(self.target_fitness, STOP_WINDOW, STOP_MIN_IMPROVEMENT,
+                                        STOP_MAX_ACCEPTANCE, STOP_RESTARTS)
+        chain_best = current_score
+        effective = 0  # Proposals that changed the score
+
+        # With CHECKPOINT_RESUME a killed run on the same text and settings picks up where it stopped
+        checkpoint = run_checkpoint('playfair', ciphertext, self.mode, fitness_name(self.fitness_function),
+                                    self.iterations)
+        saved = checkpoint.load() if checkpoint else None
+        start = 0
+        if saved:
+            random.setstate(saved['rng'])
+            sampling.stage, sampling.top = saved['stage'], saved['top']
+            self.set_window(ciphertext, sampling)
+            current_key = saved['key']
+            current_score = self.score_key(ciphertext, current_key)[0]
+            self.best_key, self.best_score = saved['best_key'], saved['best_score']
+            self.best_text = self.preview_text(ciphertext, self.best_key)
+            temp, chain_best, effective = saved['temp'], saved['chain_best'], saved['effective']
+            controller.restore(saved['controller'])
+            start = saved['iteration']
+
+        i = start
+        for i in range(start, self.iterations):
+            if checkpoint and i > start and i % CHECKPOINT_CHECK_EVERY == 0 and checkpoint.due():
+                # Everything needed to run iteration i onwards
+                checkpoint.save({
+                    'iteration': i, 'key': current_key, 'best_key': self.best_key,
+                    'best_score': self.best_score, 'temp': temp, 'chain_best': chain_best,
+                    'effective': effective, 'stage': sampling.stage, 'top': sampling.top,
+                    'controller': controller.state(), 'rng': random.getstate(),
+                })
 
-        for i in range(self.iterations):
             if not self.running:
+                controller.record('stopped', i, self.best_score)
                 break
 
+            if sampling.advance(i):
+                self.set_window(ciphertext, sampling)
+                current_score = self.score_key(ciphertext, current_key)[0]
+                self.best_key, self.best_score = sampling.rescore(
+                    lambda key: self.score_key(ciphertext, key)[0])
+                self.best_text = self.preview_text(ciphertext, self.best_key)
+                chain_best = current_score
+                controller.reset()
+
             if i % 100 == 0:
                 self.update_progress(f"Iteration {i}/{self.iterations}")
+                self.publish(i)
 
             new_key = self.swap_letters(current_key)
-            new_text = self.decrypt_with_key(ciphertext, new_key)
-            new_score = bigram_fitness(new_text)
+            if self.bounded_scoring:
+                # Draw the acceptance number first so scoring can stop as soon
+                # as the candidate is certain to be rejected
+                cutoff = acceptance_cutoff(current_score, temp, random.random())
+                new_score, new_text = self.score_key(ciphertext, new_key, cutoff)
+                accepted = new_score < cutoff
+            else:
+                new_score, new_text = self.score_key(ciphertext, new_key)
+                delta = new_score - current_score
+                # Once the temperature underflows to zero only improvements pass
+                accepted = delta < 0 or (temp > 0 and random.random() < math.exp(-delta / temp))
+            effective += new_score != current_score
 
-            delta = new_score - current_score
-            if delta < 0 or random.random() < math.exp(-delta / temp):
+            if accepted:
                 current_key = new_key
                 current_score = new_score
+                chain_best = min(chain_best, current_score)
                 
                 if current_score < self.best_score:
                     self.best_score = current_score
                     self.best_key = current_key
-                    self.best_text = new_text
-                    
-                    self.shared_score.value = current_score
-                    self.shared_text.value = self.best_text[:1000].encode()
-                    self.shared_key.value = current_key[:25].encode()
+                    self.best_text = self.preview_text(ciphertext, new_key, new_text)
+                    sampling.record(current_key, current_score)
+                    self.publish(i)
 
             temp *= self.cooling_rate
 
+            decision = controller.update(i, chain_best, accepted)
+            if decision == 'restart':
+                current_key = self.create_random_key()
+                current_score = chain_best = self.score_key(ciphertext, current_key)[0]
+                temp = self.temperature
+            elif decision:
+                break
+
+        # Only a run that ran its course clears its checkpoint; a stopped one can resume
+        if checkpoint and self.running:
+            checkpoint.clear()
+        self.stopping = controller.report(i + 1)
+        self.proposal_stats = {
+            'iterations': i + 1,
+            'active_letters': len(self.move_weights[0]),
+            'effective_rate': effective / (i + 1),
+        }
+        if sampling.active:
+            self.sample_pairs = None
+            self.best_key, self.best_score = sampling.rescore(
+                lambda key: self.fitness_function(self.decrypt_with_key(ciphertext, key)))
+            self.best_text = self.decrypt_with_key(ciphertext, self.best_key)
+        return self.best_key, self.best_score, self.best_text
+
+    def steepest_optimization(self, ciphertext):
+        """Hill climbing that scores all 300 swaps of the key square per step.
+
+        The swapped keys are decrypted together with decrypt_batch and scored
+        with score_batch. Climbs restart from a random key HILL_CLIMB_RESTARTS
+        times; self.iterations caps the total steps.
+        """
+        self.start_time = time.time()
+        self.bounded_stats = {}
+        self.stopping = None
+        self.proposal_stats = None
+        self.sample_pairs = None
+        pairs = self.prepare_pairs(ciphertext)
+        swaps = swap_pairs(25)
+        step = max(1, BATCH_LETTERS // (2 * len(pairs)))
+        self.best_key, self.best_score = None, float('inf')
+        steps = 0
+        for restart in range(HILL_CLIMB_RESTARTS):
+            if not self.running or steps >= self.iterations:
+                break
+            key = encode_text(self.create_random_key())
+            score = score_batch(self.decrypt_batch(key[None, :], pairs), fitness=self.fitness_function)[0]
+            while steps < self.iterations and self.running:
+                steps += 1
+                if steps % 100 == 0:
+                    self.update_progress(f"Step {steps}/{self.iterations}")
+                keys = np.tile(key, (len(swaps), 1))
+                keys[np.arange(len(swaps))[:, None], swaps] = key[swaps[:, ::-1]]
+                scores = np.concatenate([
+                    score_batch(self.decrypt_batch(keys[start:start + step], pairs),
+                                fitness=self.fitness_function)
+                    for start in range(0, len(keys), step)])
+                choice = pick_swap(scores - score, HILL_CLIMB_IMPROVEMENT)
+                if choice is None:
+                    break
+                key, score = keys[choice], scores[choice]
+
+            if score < self.best_score:
+                self.best_key, self.best_score = decode_codes(key), float(score)
+                self.best_text = self.decrypt_with_key(ciphertext, self.best_key)
+                self.publish(steps)
+
         return self.best_key, self.best_score, self.best_text
 
+    def publish(self, iterations):
+        """Post the best result so far to the status board, if any"""
+        if self.status:
+            self.status.publish(self.best_score, self.best_key, self.best_text, iterations)
+
+    def set_window(self, ciphertext, sampling):
+        """Score the current sample window from now on"""
+        self.sample_pairs = sampling.window() if sampling.active else None
+        self.move_weights = self.letter_weights(self.scoring_pairs(ciphertext))
+        if self.score_cache:
+            self.score_cache.bind(''.join(self.scoring_pairs(ciphertext)))
+
+    def preview_text(self, ciphertext, key, text=None):
+        """Plaintext shown while annealing; only the opening when sampling"""
+        if self.sample_pairs is None:
+            return text or self.decrypt_with_key(ciphertext, key)
+        return self.decrypt_pairs(self.create_key_matrix(key), self.prepare_pairs(ciphertext)[:500])
+
+    def score_key(self, ciphertext, key, cutoff=None):
+        """Return (score, plaintext); plaintext is None on a score cache hit.
+
+        With a cutoff the text is scored in chunks and the score is inf as
+        soon as it is certain not to beat the cutoff.
+        """
+        if self.score_cache:
+            score = self.score_cache.get(key)
+            if score is not None:
+                return score, None
+        if cutoff is None:
+            if self.sample_pairs is None:
+                text = self.decrypt_with_key(ciphertext, key)
+            else:
+                text = self.decrypt_pairs(self.create_key_matrix(key), self.sample_pairs)
+            score = self.fitness_function(text)
+        else:
+            text = None
+            length = 2 * len(self.scoring_pairs(ciphertext))
+            score = bounded_score(self.fitness_function, self.decrypt_chunks(ciphertext, key),
+                                  length, cutoff, self.bounded_stats)
+            if score == float('inf'):
+                return score, None
+        if self.score_cache:
+            self.score_cache.put(key, score)
+        return score, text
+
     def stop(self):
         self.running = False
 
@@ -182,8 +431,12 @@ class PlayfairCracker:
             else:
                 current_key = self.create_random_key()
 
-            self.update_progress("Starting Monte Carlo optimization...")
-            key, score, plaintext = self.monte_carlo_optimization(ciphertext)
+            if self.mode == 'steepest':
+                self.update_progress("Starting steepest-ascent search...")
+                key, score, plaintext = self.steepest_optimization(ciphertext)
+            else:
+                self.update_progress("Starting Monte Carlo optimization...")
+                key, score, plaintext = self.monte_carlo_optimization(ciphertext)
             
             if not plaintext or score == float('inf'):
                 raise ValueError("Failed to find valid solution")
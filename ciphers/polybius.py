@@ -5,7 +5,9 @@ from config import *  # Changed from relative to absolute import
 class PolybiusCracker:
     def __init__(self):
         self.progress_callback = None
+        self.fitness_function = bigram_fitness
         self.ALPHABET = 'ABCDEFGHIKLMNOPQRSTUVWXYZ'  # Note: I/J are combined
+        self.status = None  # StatusBoard for the best result so far
 
     def update_progress(self, message):
         if self.progress_callback:
@@ -40,7 +42,7 @@ class PolybiusCracker:
         """Evaluate a potential key"""
         square = self.create_square(key)
         plaintext = self.decode_text(ciphertext, square)
-        return bigram_fitness(plaintext), plaintext
+        return self.fitness_function(plaintext), plaintext
 
     def decrypt(self, ciphertext, initial_key=None):
         """Main decryption method"""
@@ -65,6 +67,8 @@ class PolybiusCracker:
                 best_key = key
                 best_plain = plaintext
                 self.update_progress(f"Found better key: {key} (score: {score:.4f})")
+                if self.status:
+                    self.status.publish(score, key, plaintext)
 
         if best_plain:
             return best_plain, best_key, best_score
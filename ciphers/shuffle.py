@@ -1,15 +1,34 @@
+import heapq
 import itertools
-from cipher_utils import bigram_fitness
+import numpy as np
+from concurrent.futures import as_completed
+from cipher_utils import bigram_fitness, encode_text, score_batch, BATCH_LETTERS
+from transposition import (adjacency_scores, best_orderings, ordering_likelihood, block_length_ranking,
+                           permutation_index, decode_batch, unrank_permutations, split_ranges)
+from checkpoint import run_checkpoint, fitness_name
+from shared_pool import pool_workers, codes_pool, shared_codes
 import argparse
 from config import *
 
+# Number of permutations decoded and scored together
+BATCH_SIZE = 1024
+# Exhaustive searches at least this large run in a process pool
+PARALLEL_MIN_PERMUTATIONS = 40320
+SHARDS_PER_WORKER = 8  # More shards than workers balance the load and the progress
+
 class ShuffleCracker:
     def __init__(self):
         self.progress_callback = None
+        self.fitness_function = bigram_fitness
         self.best_score = float('inf')
         self.best_text = ""
         self.best_key = None
         self.running = True
+        self.status = None  # StatusBoard for the best result so far
+        self.exhaustive = SHUFFLE_EXHAUSTIVE
+        self.top_keys = []  # Best (score, perm) pairs of the last exhaustive search
+        self.length_ranking = []  # Block lengths in search order, with why each was searched or not
+        self.target_fitness = SHUFFLE_TARGET_FITNESS
 
     def update_progress(self, message):
         """Update progress if callback is set"""
@@ -22,86 +41,132 @@ class ShuffleCracker:
 
     def apply_permutation(self, text, perm):
         """Apply a permutation key to decode text"""
-        result = ""
-        perm_len = len(perm)
-        
-        # Process text in blocks
-        for i in range(0, len(text), perm_len):
-            block = text[i:i + perm_len]
-            if len(block) < perm_len:  # Handle last incomplete block
-                result += block
-                break
-                
-            # Create mapping of current positions to original positions
-            inverse_perm = [0] * perm_len
-            for pos, val in enumerate(perm):
-                inverse_perm[val] = pos
-                
-            # Decode block using inverse permutation
-            decoded = [''] * len(block)
-            for j, char in enumerate(block):
-                decoded[inverse_perm[j]] = char
-            result += ''.join(decoded)
-            
-        return result
+        # Code points, so any character survives the round trip
+        chars = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        return chars[permutation_index(len(chars), perm)[0]].tobytes().decode('utf-32-le')
 
-    def try_all_permutations(self, ciphertext, length, queue=None):
-        """Try all possible permutations of given length"""
-        best_score = float('inf')
-        best_perm = None
-        best_plain = None
+    def try_all_permutations(self, ciphertext, length):
+        """Try all possible permutations of given length.
+
+        Permutations are addressed by lexicographic rank. With USE_PARALLEL
+        the ranks are split into contiguous shards searched by a process
+        pool, each keeping its own top SHUFFLE_TOP_K; the shards' results are
+        merged as they finish. self.top_keys holds the merged (score, perm) list.
+        With CHECKPOINTS the ranks still to search are checkpointed, so with
+        CHECKPOINT_RESUME a killed search on the same text resumes with them.
+        """
+        self.best_score = float('inf')
+        self.best_text = ""
+        self.best_key = None
+        self.top_keys = []
+        
+        codes = encode_text(ciphertext)
+        total_perms = factorial(length)
+        checkpoint = run_checkpoint('shuffle', ciphertext, length, fitness_name(self.fitness_function))
+        saved = checkpoint.load() if checkpoint else None
+        progress = saved or {'remaining': [(0, total_perms)], 'tried': 0, 'top': []}
+        # A resumed search starts from the best it had found
+        self.record_best(ciphertext, length, progress['top'], progress['tried'])
+        
+        workers = pool_workers()
+        if workers > 1 and total_perms >= PARALLEL_MIN_PERMUTATIONS:
+            top = self.search_shards(codes, ciphertext, length, workers, progress, checkpoint)
+        else:
+            top = self.search_serial(codes, ciphertext, length, progress, checkpoint)
+        # A stopped search keeps its checkpoint to resume from
+        if checkpoint and self.running:
+            checkpoint.clear()
         
+        self.top_keys = [(score, tuple(int(p) for p in perm))
+                         for (score, _), perm in zip(top, unrank_permutations([r for _, r in top], length))]
+        return self.best_text, self.best_key, self.best_score
+
+    def search_serial(self, codes, ciphertext, length, progress, checkpoint=None):
+        """Search the remaining ranks in this process; returns the top (score, rank) pairs"""
         total_perms = factorial(length)
-        tried = 0
-        last_update = 0
         update_frequency = max(100, total_perms // 100)  # Update at most 100 times
+        remaining = list(progress['remaining'])
+        done, top = progress['tried'], progress['top']
+        last_update = done
         
-        self.best_score = best_score
-        self.best_text = ""
-        self.best_key = None
+        while remaining and self.running:
+            start, stop = remaining.pop(0)
+            tried = 0
+            for tried, top in search_ranks(codes, length, start, stop, self.fitness_function,
+                                           SHUFFLE_TOP_K, top):
+                # Progress goes out less often than improvements
+                due = done + tried - last_update >= update_frequency
+                self.record_best(ciphertext, length, top, done + tried, due)
+                if due:
+                    last_update = done + tried
+                if checkpoint and checkpoint.due():
+                    checkpoint.save({'remaining': [(start + tried, stop)] + remaining,
+                                     'tried': done + tried, 'top': top})
+                if not self.running:
+                    break
+            done += tried
+        return top
+
+    def search_shards(self, codes, ciphertext, length, workers, progress, checkpoint=None):
+        """Search rank shards in a process pool; returns the merged top (score, rank) pairs"""
+        shards = split_ranges(progress['remaining'], workers * SHARDS_PER_WORKER)
+        tried, top = progress['tried'], progress['top']
+        with codes_pool(codes, workers) as executor:
+            futures = {executor.submit(_search_shard, (length, start, stop, self.fitness_function)):
+                       (start, stop) for start, stop in shards}
+            pending = dict(futures)
+            for future in as_completed(futures):
+                done, shard_top = future.result()
+                del pending[future]
+                tried += done
+                top = merge_top(top, shard_top, SHUFFLE_TOP_K)
+                # Progress across all workers goes out with every shard
+                self.record_best(ciphertext, length, top, tried, True)
+                if checkpoint and checkpoint.due():
+                    # Shards still running are searched again on resume
+                    checkpoint.save({'remaining': sorted(pending.values()), 'tried': tried, 'top': top})
+                if not self.running:
+                    for waiting in pending:
+                        waiting.cancel()
+                    break
+        return top
+
+    def record_best(self, ciphertext, length, top, tried, progress=False):
+        """Take the best of top if it improves; publish improvements and, if asked, progress"""
+        if top and top[0][0] < self.best_score:
+            self.best_score = top[0][0]
+            self.best_key = tuple(int(p) for p in unrank_permutations([top[0][1]], length)[0])
+            self.best_text = self.apply_permutation(ciphertext, self.best_key)
+            progress = True  # Post improvements straight away
+        if progress and self.status and self.best_key:
+            self.status.publish(self.best_score, self.best_key, self.best_text, tried)
+
+    def solve_length(self, ciphertext, length):
+        """Best permutation of one length from the column-adjacency search"""
+        within, across = adjacency_scores(encode_text(ciphertext), length)
+        orderings, _ = best_orderings(within, SHUFFLE_EXACT_LENGTH, SHUFFLE_BEAM_WIDTH)
         
-        for perm in itertools.permutations(range(length)):
-            # Check if we should stop
-            if not self.running:
-                break
-                
-            tried += 1
-            
-            # Update progress less frequently for better performance
-            if tried - last_update >= update_frequency:
-                if queue:
-                    # Send progress update through queue for GUI
-                    queue.put({
-                        'type': 'progress',
-                        'score': best_score,
-                        'text': best_plain if best_plain else "",
-                        'key': str(best_perm) if best_perm else ""
-                    })
-                last_update = tried
-                
-            plaintext = self.apply_permutation(ciphertext, perm)
-            score = bigram_fitness(plaintext)
-            
-            if score < best_score:
-                best_score = score
-                best_perm = perm
-                best_plain = plaintext
-                self.best_score = best_score
-                self.best_text = best_plain
-                self.best_key = best_perm
-                
-                # Send immediate update on improvement
-                if queue:
-                    queue.put({
-                        'type': 'progress',
-                        'score': best_score,
-                        'text': best_plain[:100],
-                        'key': str(best_perm)
-                    })
+        # The search ignores block boundaries; the full likelihood decides
+        candidates = orderings[:SHUFFLE_CANDIDATES]
+        best_perm = max(candidates, key=lambda perm: ordering_likelihood(perm, within, across))
+        best_plain = self.apply_permutation(ciphertext, best_perm)
+        best_score = float(score_batch([encode_text(best_plain)], fitness=self.fitness_function)[0])
         
+        if best_score < self.best_score:
+            self.best_score = best_score
+            self.best_text = best_plain
+            self.best_key = best_perm
+            if self.status:
+                self.status.publish(best_score, best_perm, best_plain, len(candidates))
         return best_plain, best_perm, best_score
 
-    def decrypt(self, ciphertext, forced_length=None, queue=None):
+    def rank_lengths(self, codes):
+        """Candidate block lengths, most likely first, from in-block vs cross-block bigrams"""
+        lengths = range(MIN_KEY_LENGTH, MAX_KEY_LENGTH + 1)
+        return block_length_ranking(codes, lengths, max_letters=SHUFFLE_RANKING_LETTERS,
+                                    divisor_bonus=SHUFFLE_DIVISOR_BONUS)
+
+    def decrypt(self, ciphertext, forced_length=None):
         # Reset running flag at start
         self.running = True
         
@@ -110,35 +175,76 @@ class ShuffleCracker:
         if not ciphertext:
             raise ValueError("No valid characters in input text")
         
+        self.best_score = float('inf')
+        self.length_ranking = []
+        search = self.try_all_permutations if self.exhaustive else self.solve_length
+        
         if forced_length:
             key_length = forced_length
         else:
-            # Try lengths within configured bounds
+            # Most likely lengths within configured bounds first
+            codes = encode_text(ciphertext)
+            self.length_ranking = self.rank_lengths(codes)
             best_score = float('inf')
             best_length = None
             best_plain = None
             best_perm = None
             
-            for length in range(MIN_KEY_LENGTH, MAX_KEY_LENGTH + 1):
+            for entry in self.length_ranking:
                 # Check if we should stop
-                if not self.running:
-                    break
+                if not self.running or (self.target_fitness is not None and best_score < self.target_fitness):
+                    entry['status'] = 'not reached'
+                    continue
+                if entry['confidence'] < SHUFFLE_MIN_CONFIDENCE:
+                    entry['status'] = 'pruned'
+                    continue
                     
                 # No text output, just compute
-                plaintext, perm, score = self.try_all_permutations(ciphertext, length, queue)
+                plaintext, perm, score = search(ciphertext, entry['length'])
+                entry['status'] = 'searched'
+                entry['score'] = score
                 
-                if score < best_score:
+                # The adjacency search fits any length's blocks to English, so
+                # a less likely length must score clearly better to win
+                if best_length is None or score < best_score * (1 - SHUFFLE_LENGTH_MARGIN):
                     best_score = score
-                    best_length = length
+                    best_length = entry['length']
                     best_plain = plaintext
                     best_perm = perm
-                    if best_score < 0.4:
-                        break
             
             return best_plain, best_perm, best_score
             
         # No text output, just use the specified key length
-        return self.try_all_permutations(ciphertext, key_length, queue)
+        return search(ciphertext, key_length)
+
+def search_ranks(codes, length, start, stop, fitness, top_k, top=None):
+    """Score the permutations with lexicographic ranks in [start, stop).
+
+    Yields (tried, top) after every batch, where top is the best top_k
+    (score, rank) pairs so far, best first, including those of top.
+    """
+    batch_size = max(1, min(BATCH_SIZE, BATCH_LETTERS // max(len(codes), 1)))
+    top = list(top or [])
+    for first in range(start, stop, batch_size):
+        ranks = np.arange(first, min(first + batch_size, stop), dtype=np.int64)
+        scores = score_batch(decode_batch(codes, unrank_permutations(ranks, length)), fitness=fitness)
+        best = np.argsort(scores, kind='stable')[:top_k]
+        top = merge_top(top, zip(scores[best].tolist(), ranks[best].tolist()), top_k)
+        yield int(ranks[-1]) + 1 - start, top
+
+
+def merge_top(top, candidates, top_k):
+    """Best top_k (score, rank) pairs of two lists; ties go to the lower rank"""
+    return heapq.nsmallest(top_k, itertools.chain(top, candidates))
+
+
+def _search_shard(args):
+    length, start, stop, fitness = args
+    tried, top = 0, []
+    for tried, top in search_ranks(shared_codes(), length, start, stop, fitness, SHUFFLE_TOP_K):
+        pass
+    return tried, top
+
 
 def factorial(n):
     """Calculate factorial of n"""
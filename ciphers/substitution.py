@@ -1,39 +1,163 @@
 import string
 import random
 import math
+import itertools
 from collections import Counter
-from cipher_utils import bigram_fitness  # Use absolute import
+from cipher_utils import (bigram_fitness, score_state, ScoreCache, SampleSchedule, StoppingController,  # Use absolute import
+                          acceptance_cutoff, pick_swap, skip_report, bigram_counts, encode_text)
+from ngram_scorer import get_scorer, scorer_target
+from status_board import StatusBoard
+from word_patterns import presolve
+from checkpoint import run_checkpoint, fitness_name
+from shared_pool import pool_workers, can_start_pool
 from config import *  # Use absolute import
+import os
 import time
 from multiprocessing import Value, Array
+from concurrent.futures import ProcessPoolExecutor
 import argparse
 import ctypes
+import logging
 
-def run_substitution_process(cipher_text, queue=None):
-    """Standalone function to run substitution decoding in a separate process"""
+def run_substitution_process(cipher_text, status=None, scorer='bigram', chains=None, seed=None,
+                             mode='anneal', target=None):
+    """Standalone function to run substitution decoding in a separate process.
+
+    status is the name of a StatusBoard that receives the best result so
+    far. mode is one of SubstitutionCracker.MODES. With more than one chain
+    (default shared_pool.pool_workers(), read when the run starts)
+    independent annealing chains run in a process pool and exchange their
+    best key; the best chain's result is returned. The
+    Jakobsen solver is deterministic and always runs as a single chain;
+    steepest ascent does its own restarts. The word-pattern pre-solver runs
+    once here, before any chain starts.
+    target overrides TARGET_FITNESS, the score at which the run stops;
+    scorers other than 'bigram' have no target.
+    """
     try:
-        cracker = SubstitutionCracker()
-        cracker.queue = queue
-        plaintext, key, score = cracker.decrypt(cipher_text)
-        
-        # Ensure we clean up shared memory
-        cracker._cleanup_shared_memory()
-        
-        return {
-            'plaintext': plaintext,
-            'key': key,
-            'score': score,
-            'success': True
-        }
+        if mode not in SubstitutionCracker.MODES:
+            raise ValueError(f"Unknown substitution mode: {mode}")
+        if chains is None:
+            chains = pool_workers()
+        if mode != 'anneal':
+            chains = 1
+        presolved = presolve_key(cipher_text) if mode == 'anneal' else {}
+        if chains > 1 and can_start_pool():
+            return run_island_chains(cipher_text, status, scorer, chains, seed, mode, target, presolved)
+
+        if seed is not None:
+            random.seed(seed)
+        return _run_chain((cipher_text, status, scorer, mode, target, presolved))
     except Exception as e:
         return {
             'success': False,
             'error': str(e)
         }
 
+
+def run_island_chains(cipher_text, status, scorer, chains, seed=None, mode='anneal', target=None,
+                      presolved=None):
+    """Run seeded annealing chains in parallel with best-key migration"""
+    island = {
+        'score': Value(ctypes.c_double, float('inf')),
+        'key': Array(ctypes.c_char, 27),
+        'stage': Value(ctypes.c_int, 0),
+        'stop': Value(ctypes.c_bool, False),
+    }
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    with ProcessPoolExecutor(max_workers=chains, initializer=_init_island,
+                             initargs=(island, status)) as executor:
+        results = list(executor.map(_run_island_chain,
+                                    [(cipher_text, scorer, seed, i, mode, target, presolved)
+                                     for i in range(chains)]))
+
+    finished = [r for r in results if r['success']]
+    if not finished:
+        return results[0]
+    # Chain scores are all on the full text, so they compare directly
+    result = min(finished, key=lambda r: r['score'])
+    result['chains'] = chains
+    result['chain_scores'] = [r['score'] for r in finished]
+    return result
+
+
+_island = None  # Shared state of the chains in a worker process
+
+def _init_island(island, status):
+    global _island
+    _island = dict(island, status=status, parent=os.getppid())
+
+
+def _run_island_chain(args):
+    cipher_text, scorer, seed, chain, mode, target, presolved = args
+    random.seed(seed + chain)
+    return _run_chain((cipher_text, _island['status'], scorer, mode, target, presolved), _island, chain)
+
+
+def _run_chain(args, island=None, chain=0):
+    cipher_text, status, scorer, mode, target, presolved = args
+    cracker = SubstitutionCracker()
+    cracker.mode = mode
+    cracker.chain = chain
+    cracker.target_fitness = scorer_target(scorer, cracker.target_fitness if target is None else target)
+    cracker.island = island
+    cracker.fitness_function = get_scorer(scorer)
+    cracker.status = StatusBoard(status) if status else None
+    try:
+        plaintext, key, score = cracker.decrypt(cipher_text, presolved)
+    finally:
+        if cracker.status:
+            cracker.status.close()
+
+    result = {
+        'plaintext': plaintext,
+        'key': key,
+        'score': score,
+        'success': True
+    }
+    if cracker.score_cache:
+        result['cache_stats'] = cracker.score_cache.stats()
+    if cracker.bounded_scoring:
+        result['bounded_scoring'] = skip_report(cracker.bounded_stats)
+    if cracker.stopping:
+        result['stopping'] = cracker.stopping
+    if cracker.presolved:
+        result['presolve'] = cracker.presolved
+    if cracker.proposal_stats:
+        result['proposals'] = cracker.proposal_stats
+    return result
+
+
+def presolve_key(text):
+    """Word-pattern pre-solve of a raw ciphertext, as a report dict.
+
+    When its confidence reaches PRESOLVE_MIN_CONFIDENCE, 'mapping' seeds the
+    initial key and 'fixed' lists the cipher letters backed by at least
+    PRESOLVE_MIN_SUPPORT explained words, which stay pinned; the annealer may
+    swap the others out. A search that fails or times out seeds nothing.
+    Empty when the pre-solver is off.
+    """
+    if not USE_WORD_PATTERNS:
+        return {}
+    try:
+        mapping, confidence, support = presolve(text)
+    except Exception as e:
+        return {'used': False, 'mapping': {}, 'fixed': [], 'error': f"{type(e).__name__}: {e}"}
+    used = confidence >= PRESOLVE_MIN_CONFIDENCE
+    return {
+        'confidence': confidence,
+        'resolved': len(mapping),
+        'used': used,
+        'mapping': mapping if used else {},
+        'fixed': sorted(c for c in mapping if support[c] >= PRESOLVE_MIN_SUPPORT) if used else [],
+    }
+
 class SubstitutionCracker:
+    MODES = ('anneal', 'jakobsen', 'steepest')
+
     def __init__(self):
         self.running = True
+        self.mode = 'anneal'
         self.LETTERS = string.ascii_uppercase
         self.progress_callback = None
         self.temperature = 10.0
@@ -43,30 +167,20 @@ class SubstitutionCracker:
         self.best_score = float('inf')
         self.best_text = ""
         self.best_key = ""
-        self.queue = None
-        self._init_shared_memory()
-
-    def _init_shared_memory(self):
-        try:
-            self.shared_score = Value(ctypes.c_double, float('inf'))
-            self.shared_text = Array(ctypes.c_char, 1000)
-            self.shared_key = Array(ctypes.c_char, 27)
-        except Exception as e:
-            print(f"Warning: Could not initialize shared memory: {e}")
-            self.shared_score = None
-            self.shared_text = None
-            self.shared_key = None
-
-    def _cleanup_shared_memory(self):
-        try:
-            if hasattr(self, 'shared_score'):
-                self.shared_score = None
-            if hasattr(self, 'shared_text'):
-                self.shared_text = None
-            if hasattr(self, 'shared_key'):
-                self.shared_key = None
-        except:
-            pass
+        self.status = None  # StatusBoard for the best result so far
+        self.fitness_function = bigram_fitness
+        self.score_cache = ScoreCache(SCORE_CACHE_MAX_BYTES) if SCORE_CACHE_MAX_BYTES else None
+        self.bounded_scoring = BOUNDED_SCORING
+        self.bounded_stats = {}
+        self.island = None  # Shared best key when running as one of several chains
+        self.chain = 0  # Index among parallel chains, which keep separate checkpoints
+        self.target_fitness = TARGET_FITNESS  # None never stops on a score
+        self.stopping = None  # Report of the adaptive stopping decisions
+        self.seed_letters = {}  # Cipher -> plaintext letters from the pre-solver
+        self.fixed_letters = {}  # The seed letters the annealer may not swap
+        self.free_positions = list(range(26))  # Key positions the annealer may swap
+        self.presolved = None
+        self.proposal_stats = None
 
     def update_progress(self, message):
         "update"
@@ -74,28 +188,71 @@ class SubstitutionCracker:
             self.progress_callback(message)
 
     def create_random_key(self):
-        english_freq = list("ETAOINSHRDLCUMWFGYPBVKJXQZ")
+        # Letters from the pre-solver stay; the rest match by frequency
+        seeded = self.seed_letters
+        english_freq = [c for c in "ETAOINSHRDLCUMWFGYPBVKJXQZ" if c not in seeded.values()]
         
         freq_count = Counter(self.ciphertext)
         
-        cipher_freq = sorted(set(self.LETTERS), 
+        cipher_freq = sorted(set(self.LETTERS) - set(seeded), 
                            key=lambda x: freq_count.get(x, 0),
                            reverse=True)
         
-        key_dict = {}
-        for i in range(len(self.LETTERS)):
-            if i < len(cipher_freq):
-                key_dict[cipher_freq[i]] = english_freq[i]
-            else:
-                # Handle any missing letters
-                unused = [c for c in english_freq if c not in key_dict.values()]
-                unmapped = [c for c in self.LETTERS if c not in key_dict.keys()]
-                for c, e in zip(unmapped, unused):
-                    key_dict[c] = e
+        key_dict = dict(seeded)
+        for c, e in zip(cipher_freq, english_freq):
+            key_dict[c] = e
         
         key = ''.join(key_dict[c] for c in self.LETTERS)
         return key
 
+    def shuffled_key(self, key):
+        """Random restart key that keeps the letters fixed by the pre-solver"""
+        letters = list(key)
+        free = [letters[i] for i in self.free_positions]
+        random.shuffle(free)
+        for i, c in zip(self.free_positions, free):
+            letters[i] = c
+        return ''.join(letters)
+
+    def active_positions(self, text):
+        """Free key positions whose cipher letter occurs in text.
+
+        Returns the positions and cumulative weights proportional to each
+        letter's share of the text's bigrams, for random.choices.
+        """
+        counts = bigram_counts(encode_text(text))
+        mass = counts.sum(axis=0) + counts.sum(axis=1)
+        active = [i for i in self.free_positions if mass[i] > 0]
+        return active, list(itertools.accumulate(float(mass[i]) for i in active))
+
+    def propose_swap(self, active, cum_weights):
+        """Two key positions to swap; the first is a letter of the text.
+
+        Swapping two letters that never occur cannot change the decryption,
+        so such moves are never proposed. The second position is uniform over
+        the other free positions.
+        """
+        pos1 = random.choices(active, cum_weights=cum_weights)[0]
+        free = self.free_positions
+        pos2 = free[random.randrange(len(free) - 1)]
+        if pos2 == pos1:
+            pos2 = free[-1]
+        return pos1, pos2
+
+    def presolve(self, text, presolved=None):
+        """Seed key letters from word patterns when the text keeps word breaks.
+
+        presolved is a presolve_key report made beforehand, e.g. once for all
+        parallel chains; without one the pre-solver runs here.
+        """
+        if presolved is None:
+            presolved = presolve_key(text) if self.mode == 'anneal' else {}
+        self.presolved = presolved or None
+        self.proposal_stats = None
+        self.seed_letters = presolved.get('mapping', {})
+        self.fixed_letters = {c: self.seed_letters[c] for c in presolved.get('fixed', [])}
+        self.free_positions = [i for i, c in enumerate(self.LETTERS) if c not in self.fixed_letters]
+
     def swap_letters(self, key):
         """Create new key by swapping two random positions"""
         pos1, pos2 = random.sample(range(26), 2)
@@ -114,71 +271,328 @@ class SubstitutionCracker:
     def updateMssg(self):
         """Return current best metrics and elapsed time"""
         current_time = time.time() - (self.start_time or time.time())
+        snapshot = self.status.read() if self.status else None
+        if snapshot is None:
+            snapshot = {'score': self.best_score, 'text': self.best_text, 'key': self.best_key}
         return {
             'time': f"{current_time:.1f}s",
-            'best_score': self.shared_score.value,
-            'best_text': self.shared_text.value.decode(),
-            'best_key': self.shared_key.value.decode()
+            'best_score': snapshot['score'],
+            'best_text': snapshot['text'],
+            'best_key': snapshot['key']
         }
 
     def monte_carlo_optimization(self, ciphertext: str) -> tuple[str, float]:
         self.ciphertext = ciphertext
         self.start_time = time.time()
         current_key = self.create_random_key()
-        current_score = bigram_fitness(self.decrypt_with_key(ciphertext, current_key))
+        self.bounded_stats = {}
+        # Long texts are annealed on a growing sample window; scores from
+        # different windows are not comparable, so the best keys are re-scored
+        # whenever it grows and verified on the full text at the end
+        sampling = SampleSchedule(ciphertext, self.iterations, SAMPLE_SCHEDULE, SAMPLE_MIN_LENGTH,
+                                  SAMPLE_SEGMENTS, SAMPLE_VERIFY_TOP)
+        window = sampling.window()
+        # Bigram fitness scores swaps as deltas on the bigram-count matrix;
+        # other scorers decrypt and rescore (or bound-score) the window
+        state = score_state(window, current_key, self.fitness_function, self.bounded_stats)
+        if self.score_cache:
+            self.score_cache.bind(window)
+        current_score = state.score
         best_key = current_key
         best_score = current_score
-        best_text = self.decrypt_with_key(ciphertext, current_key)
+        best_text = None
+        sampling.record(best_key, best_score)
+        improved = False
         temp = self.temperature
+        # Stops on the target score, restarts or ends the chain on stagnation
+        controller = StoppingController(self.target_fitness, STOP_WINDOW, STOP_MIN_IMPROVEMENT,
+                                        STOP_MAX_ACCEPTANCE, STOP_RESTARTS)
+        chain_best = current_score
         
         # Update frequency control
         update_interval = max(500, self.iterations // 20)  # Update at most 20 times
 
-        for i in range(self.iterations):
+        # Moves only start from letters that occur, weighted by bigram mass
+        active, cum_weights = self.active_positions(window)
+        # With fewer than two free letters there is nothing left to anneal
+        iterations = self.iterations if len(self.free_positions) > 1 and active else 0
+        effective = 0  # Proposals that changed the score
+
+        # With CHECKPOINT_RESUME a killed run on the same text and settings picks up where it stopped
+        checkpoint = run_checkpoint('substitution', ciphertext, self.mode, fitness_name(self.fitness_function),
+                                    self.iterations, self.chain, USE_WORD_PATTERNS,
+                                    PRESOLVE_MIN_CONFIDENCE, PRESOLVE_MIN_SUPPORT,
+                                    sorted(self.seed_letters.items()), sorted(self.fixed_letters.items()))
+        saved = checkpoint.load() if checkpoint else None
+        start = 0
+        if saved:
+            random.setstate(saved['rng'])
+            sampling.stage, sampling.top = saved['stage'], saved['top']
+            window = sampling.window()
+            state = score_state(window, saved['key'], self.fitness_function, self.bounded_stats)
+            if self.score_cache:
+                self.score_cache.bind(window)
+            current_score = state.score
+            best_key, best_score, best_text = saved['best_key'], saved['best_score'], None
+            temp, chain_best, effective = saved['temp'], saved['chain_best'], saved['effective']
+            controller.restore(saved['controller'])
+            active, cum_weights = self.active_positions(window)
+            start = saved['iteration']
+
+        completed = True
+        i = start - 1
+        for i in range(start, iterations):
+            if checkpoint and i > start and i % CHECKPOINT_CHECK_EVERY == 0 and checkpoint.due():
+                # Everything needed to run iteration i onwards
+                checkpoint.save({
+                    'iteration': i, 'key': state.key_string(), 'best_key': best_key,
+                    'best_score': best_score, 'temp': temp, 'chain_best': chain_best,
+                    'effective': effective, 'stage': sampling.stage, 'top': sampling.top,
+                    'controller': controller.state(), 'rng': random.getstate(),
+                })
+
+            if sampling.advance(i):
+                window = sampling.window()
+                state = score_state(window, state.key_string(), self.fitness_function, self.bounded_stats)
+                if self.score_cache:
+                    self.score_cache.bind(window)
+                current_score = state.score
+                best_key, best_score = sampling.rescore(
+                    lambda key: self.fitness_function(self.decrypt_with_key(window, key)))
+                chain_best = current_score
+                controller.reset()
+                active, cum_weights = self.active_positions(window)
+
+            if self.island and i and i % MIGRATION_INTERVAL == 0:
+                stop, migrant = self.migrate(best_key, best_score, sampling.stage, not improved)
+                if stop or not self.running:
+                    controller.record('stopped', i, best_score)
+                    # Another chain reaching the target completes the run;
+                    # a terminated one does not
+                    completed = self.running and os.getppid() == self.island['parent']
+                    break
+                if migrant:
+                    # A stagnant chain restarts from the global best
+                    state = score_state(window, migrant, self.fitness_function, self.bounded_stats)
+                    current_score = chain_best = state.score
+                    best_key, best_score, best_text = migrant, current_score, None
+                    sampling.record(best_key, best_score)
+                    controller.reset()
+                improved = False
+
             # Only update progress every update_interval iterations
             if i % update_interval == 0:
-                if self.queue:
-                    self.queue.put({
-                        'type': 'progress',
-                        'score': best_score,
-                        'text': best_text[:100],  # Limit text length
-                        'key': best_key
-                    })
+                if best_text is None:
+                    best_text = self.decrypt_with_key(ciphertext, best_key)
+                self.publish(best_score, best_key, best_text, i)
 
             # Create neighbor solution
-            new_key = self.swap_letters(current_key)
-            new_text = self.decrypt_with_key(ciphertext, new_key)
-            new_score = bigram_fitness(new_text)
-
-            # Calculate acceptance probability
-            delta = new_score - current_score
-            if delta < 0 or random.random() < math.exp(-delta / temp):
-                current_key = new_key
-                current_score = new_score
+            pos1, pos2 = self.propose_swap(active, cum_weights)
+            if self.bounded_scoring:
+                # Pre-drawn acceptance number turns the rule into a score cutoff
+                cutoff = acceptance_cutoff(current_score, temp, random.random())
+                delta = self.score_swap(state, pos1, pos2, cutoff)
+                accepted = current_score + delta < cutoff
+            else:
+                delta = self.score_swap(state, pos1, pos2)
+                # Calculate acceptance probability
+                accepted = delta < 0 or random.random() < math.exp(-delta / temp)
+            effective += delta != 0
+
+            if accepted:
+                state.commit_swap(pos1, pos2, current_score + delta)
+                current_score = state.score
+                chain_best = min(chain_best, current_score)
                 if current_score < best_score:
                     best_score = current_score
-                    best_key = current_key
-                    best_text = new_text
-                    # Update shared memory
-                    if self.shared_score:
-                        self.shared_score.value = current_score
-                        self.shared_text.value = best_text[:1000].encode()
-                        self.shared_key.value = current_key.encode()
+                    best_key = state.key_string()
+                    best_text = None
+                    improved = True
+                    sampling.record(best_key, best_score)
             temp *= self.cooling_rate
 
+            decision = controller.update(i, chain_best, accepted)
+            if decision == 'restart':
+                state = score_state(window, self.shuffled_key(state.key_string()),
+                                    self.fitness_function, self.bounded_stats)
+                current_score = chain_best = state.score
+                temp = self.temperature
+            elif decision:
+                if decision == 'target' and self.island:
+                    self.island['stop'].value = True
+                break
+
+        # Only a run that ran its course clears its checkpoint; a stopped one can resume
+        if checkpoint and completed:
+            checkpoint.clear()
+        self.stopping = controller.report(i + 1)
+        # A uniform pick of two free positions would waste the swaps of two
+        # letters that never occur
+        free, dead = len(self.free_positions), len(self.free_positions) - len(active)
+        self.proposal_stats = {
+            'iterations': i + 1,
+            'active_letters': len(active),
+            'effective_rate': effective / (i + 1) if i >= 0 else 0.0,
+            'uniform_effective_rate': 1 - dead * (dead - 1) / (free * (free - 1)) if free > 1 else 0.0,
+        }
+        if sampling.active:
+            best_key, best_score = sampling.rescore(
+                lambda key: self.fitness_function(self.decrypt_with_key(ciphertext, key)))
+            best_text = None
+        if best_text is None:
+            best_text = self.decrypt_with_key(ciphertext, best_key)
+        self.publish(best_score, best_key, best_text, i + 1)
+
         # Store best results in instance for compatibility
         self.best_key = best_key
         self.best_score = best_score
         self.best_text = best_text
         return best_key, best_score
 
-    def decrypt(self, ciphertext: str) -> tuple[str, str, float]:
-        """Main decryption method"""
+    def jakobsen_optimization(self, ciphertext: str) -> tuple[str, float]:
+        """Jakobsen's deterministic hill climb.
+
+        Key letters are tried in swaps at distance 1, 2, ... along the
+        ciphertext letter-frequency order, and the sweep restarts after every
+        improvement. With bigram fitness each swap is scored on the 26x26
+        count matrix computed once from the ciphertext, so the per-step cost
+        does not grow with the text length.
+        """
+        self.ciphertext = ciphertext
+        self.start_time = time.time()
+        self.bounded_stats = {}
+        key = self.create_random_key()
+        state = score_state(ciphertext, key, self.fitness_function, self.bounded_stats)
+        counts = Counter(ciphertext)
+        order = sorted(range(26), key=lambda i: -counts.get(self.LETTERS[i], 0))
+        update_interval = max(500, self.iterations // 20)
+
+        proposals = 0
+        improved = True
+        while improved and self.running and proposals < self.iterations:
+            improved = False
+            for distance in range(1, 26):
+                for start in range(26 - distance):
+                    if proposals % update_interval == 0:
+                        self.report_best(ciphertext, state.key_string(), state.score, proposals)
+                    proposals += 1
+                    pos1, pos2 = order[start], order[start + distance]
+                    delta = state.swap_delta(pos1, pos2)
+                    if delta < 0:
+                        state.commit_swap(pos1, pos2, state.score + delta)
+                        improved = True
+                        break
+                if improved or proposals >= self.iterations:
+                    break
+
+        self.best_key = state.key_string()
+        self.best_score = state.score
+        self.best_text = self.report_best(ciphertext, self.best_key, self.best_score, proposals)
+        return self.best_key, self.best_score
+
+    def steepest_optimization(self, ciphertext: str) -> tuple[str, float]:
+        """Hill climbing that scores all 325 swaps of the key per step.
+
+        Each step applies the best (or, with HILL_CLIMB_IMPROVEMENT 'first',
+        a random improving) swap until none improves, then restarts from a
+        random key, HILL_CLIMB_RESTARTS times. The first climb starts from
+        the frequency-matched key. self.iterations caps the total steps.
+        """
+        self.ciphertext = ciphertext
+        self.start_time = time.time()
+        self.bounded_stats = {}
+        best_key, best_score = None, float('inf')
+        steps = 0
+        for restart in range(HILL_CLIMB_RESTARTS):
+            if not self.running or steps >= self.iterations:
+                break
+            key = self.create_random_key() if restart == 0 else ''.join(random.sample(self.LETTERS, 26))
+            state = score_state(ciphertext, key, self.fitness_function, self.bounded_stats)
+            while steps < self.iterations and self.running:
+                steps += 1
+                pairs, deltas = state.all_swap_deltas()
+                choice = pick_swap(deltas, HILL_CLIMB_IMPROVEMENT)
+                if choice is None:
+                    break
+                pos1, pos2 = pairs[choice]
+                state.commit_swap(pos1, pos2, state.score + deltas[choice])
+
+            if state.score < best_score:
+                best_key, best_score = state.key_string(), state.score
+                self.report_best(ciphertext, best_key, best_score, steps)
+
+        self.best_key = best_key
+        self.best_score = best_score
+        self.best_text = self.decrypt_with_key(ciphertext, best_key)
+        return best_key, best_score
+
+    def migrate(self, best_key, best_score, stage, stagnant):
+        """Exchange the best key with the other chains.
+
+        Returns (stop, key); key is the global best when this chain is
+        stagnant and behind, else None. Scores are only compared between
+        chains on the same sample window.
+        """
+        island = self.island
+        migrant = None
+        with island['score'].get_lock():
+            if stage > island['stage'].value or best_score < island['score'].value:
+                if stage >= island['stage'].value:
+                    island['stage'].value = stage
+                    island['score'].value = best_score
+                    island['key'].value = best_key.encode()
+            elif stagnant and stage == island['stage'].value and island['score'].value < best_score:
+                migrant = island['key'].value.decode()
+        # Stop once any chain is good enough, or if the run was terminated
+        reached = self.target_fitness is not None and best_score <= self.target_fitness
+        if reached or os.getppid() != island['parent']:
+            island['stop'].value = True
+        return island['stop'].value, migrant
+
+    def score_swap(self, state, pos1, pos2, cutoff=None):
+        """Score change of a swap, served from the score cache when enabled"""
+        if not self.score_cache:
+            return state.swap_delta(pos1, pos2, cutoff)
+        new_key = state.swapped_key(pos1, pos2)
+        score = self.score_cache.get(new_key)
+        if score is None:
+            score = state.score + state.swap_delta(pos1, pos2, cutoff)
+            if score != float('inf'):
+                self.score_cache.put(new_key, score)
+        return score - state.score
+
+    def report_best(self, ciphertext, key, score, iterations=0):
+        """Decode the best key and publish it to the status board"""
+        text = self.decrypt_with_key(ciphertext, key)
+        self.publish(score, key, text, iterations)
+        return text
+
+    def publish(self, score, key, text, iterations=0):
+        """Post the best result so far to the status board, if any"""
+        if not self.status:
+            return
+        if not self.island:
+            self.status.publish(score, key, text, iterations)
+            return
+        # Chains share one board; only the current leader posts
+        with self.island['score'].get_lock():
+            if score <= self.island['score'].value:
+                self.status.publish(score, key, text, iterations)
+
+    def decrypt(self, ciphertext: str, presolved=None) -> tuple[str, str, float]:
+        """Main decryption method; presolved as for presolve()"""
+        # The pre-solver needs the word breaks, so it sees the raw text
+        self.presolve(ciphertext, presolved)
         ciphertext = ''.join(c.upper() for c in ciphertext if c.isalpha())
         if not ciphertext:
             raise ValueError("No valid characters in input text")
 
-        key, score = self.monte_carlo_optimization(ciphertext)
+        if self.mode == 'jakobsen':
+            key, score = self.jakobsen_optimization(ciphertext)
+        elif self.mode == 'steepest':
+            key, score = self.steepest_optimization(ciphertext)
+        else:
+            key, score = self.monte_carlo_optimization(ciphertext)
         plaintext = self.decrypt_with_key(ciphertext, key)
         logging.info(f"Decryption complete. Best score: {score:.4f}")
         return plaintext, key, score
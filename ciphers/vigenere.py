@@ -1,20 +1,37 @@
 import string
-from collections import Counter
-from concurrent.futures import ThreadPoolExecutor
-from cipher_utils import bigram_fitness  # Changed from relative to absolute import
+import numpy as np
+from concurrent.futures import as_completed
+from cipher_utils import bigram_fitness, encode_text, decode_codes, score_batch, BATCH_LETTERS  # Changed from relative to absolute import
+from periodic_stats import (ColumnStats, column_histograms, column_ioc, column_chi_squared,
+                            letter_freqs, periodic_decrypt, beam_keys, repeated_ngrams,
+                            key_length_evidence)
+from shared_pool import pool_workers, codes_pool, shared_codes
 import argparse
 from config import *
 
+
+def _solve_length(key_length, settings):
+    cracker = VigenereCracker()
+    cracker.fitness_function, cracker.top_shifts, cracker.beam_width = settings
+    return (key_length,) + cracker.solve_length(ColumnStats(shared_codes()), key_length)
+
+
 class VigenereCracker:
     def __init__(self):
         self.LETTERS = string.ascii_uppercase
         self.ENGLISH_FREQS = ENGLISH_FREQS
+        self.LETTER_FREQS = letter_freqs(ENGLISH_LETTER_FREQS)
+        self.top_shifts = VIGENERE_TOP_SHIFTS
+        self.beam_width = VIGENERE_BEAM_WIDTH
         self.EXPECTED_IOC = EXPECTED_IOC
         self.progress_callback = None
+        self.fitness_function = bigram_fitness
         self.best_score = float('inf')
         self.best_text = ""
         self.best_key = ""
         self.target_fitness = 0.4  # Add default target fitness
+        self.status = None  # StatusBoard for the best result so far
+        self.length_scores = {}  # Final score of every key length solved
 
     def update_progress(self, message):
         """Update progress if callback is set"""
@@ -24,104 +41,72 @@ class VigenereCracker:
 
     def calculate_IoC(self, text):
         """Calculate Index of Coincidence"""
-        n = len(text)
-        if n < 2:
-            return 0
-        freqs = Counter(text)
-        ioc = sum(f * (f-1) for f in freqs.values()) / (n * (n-1))
-        return ioc * 26.0
+        return float(column_ioc(column_histograms(encode_text(text), 1))[0])
 
     def find_repeated_sequences(self, text):
+        """Positions of every sequence repeated at least MIN_REPETITIONS times"""
+        codes = encode_text(text)
         repeats = {}
         for length in range(MIN_SEQUENCE_LENGTH, MAX_SEQUENCE_LENGTH):
-            for i in range(len(text) - length):
-                seq = text[i:i + length]
-                if seq in repeats:
-                    repeats[seq].append(i)
-                else:
-                    repeats[seq] = [i]
-        return {k: v for k, v in repeats.items() if len(v) >= MIN_REPETITIONS}
-
-    def determine_key_length(self, ciphertext):
+            positions, bounds = repeated_ngrams(codes, length, MIN_REPETITIONS)
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                group = positions[start:end].tolist()
+                repeats[text[group[0]:group[0] + length]] = group
+        return repeats
+
+    def determine_key_length(self, ciphertext, stats=None):
         """Combined key length detection using Kasiski and IoC with config bounds"""
-        repeats = self.find_repeated_sequences(ciphertext)
-        factors = Counter()
-        
-        # Get factors within configured range
-        for positions in repeats.values():
-            spacings = [positions[i + 1] - positions[i] for i in range(len(positions) - 1)]
-            for spacing in spacings:
-                for i in range(MIN_KEY_LENGTH, min(spacing, MAX_KEY_LENGTH + 1)):
-                    if spacing % i == 0:
-                        factors[i] += 1
-    
-        candidates = []
-        # Only consider lengths within configured range
-        for length in range(MIN_KEY_LENGTH, MAX_KEY_LENGTH + 1):
-            total_ioc = 0
-            for i in range(length):
-                column = ciphertext[i::length]
-                total_ioc += self.calculate_IoC(column)
-            avg_ioc = total_ioc / length
-            score = abs(avg_ioc - self.EXPECTED_IOC)
-            if length in factors:
-                score *= 0.5  # Prefer lengths that appear as factors
-            candidates.append((length, score))
-    
-        if not candidates:
+        evidence = key_length_evidence(ciphertext, MIN_KEY_LENGTH, MAX_KEY_LENGTH, self.EXPECTED_IOC,
+                                       (MIN_SEQUENCE_LENGTH, MAX_SEQUENCE_LENGTH), MIN_REPETITIONS, stats)
+        if not evidence:
             print(f"Warning: No candidates found in range {MIN_KEY_LENGTH}-{MAX_KEY_LENGTH}")
             return MIN_KEY_LENGTH
     
-        best_length = min(candidates, key=lambda x: x[1])[0]
-        ioc = sum(self.calculate_IoC(ciphertext[i::best_length]) 
-                 for i in range(best_length)) / best_length
-        
-        print(f"Key length found: {best_length} (IoC: {ioc:.3f})")
-        return best_length
+        best = evidence[0]
+        print(f"Key length found: {best['length']} (IoC: {best['ioc']:.3f})")
+        return best['length']
     
     def try_key_permutations(self, ciphertext, key):
         """Try all cyclic shifts of the key and find best scoring result"""
         best_score = float('inf')
         best_key = key
-        best_plain = None
+        best = None
         
-        # Try all rotations of the key
-        for i in range(len(key)):
-            rotated_key = key[i:] + key[:i]
-            plaintext = ''
-            
-            # Decrypt with current key rotation
-            for j, c in enumerate(ciphertext):
-                shift = ord(rotated_key[j % len(rotated_key)]) - ord('A')
-                plaintext += chr((ord(c) - ord('A') - shift) % 26 + ord('A'))
-            
-            # Score using bigram fitness
-            score = bigram_fitness(plaintext)
-            
+        # Every rotation at once: row i uses key[i:] + key[:i]
+        codes = encode_text(ciphertext) if isinstance(ciphertext, str) else ciphertext
+        shifts = encode_text(key)
+        rotations = np.array([np.roll(shifts, -i) for i in range(len(key))])
+        scores = self.score_keys(codes, rotations)
+        
+        for i, score in enumerate(scores):
             # Update if better score found
             if score < best_score:
-                best_score = score
-                best_key = rotated_key
-                best_plain = plaintext
+                best_score = float(score)
+                best_key = key[i:] + key[:i]
+                best = i
                 print(f"Found better key: {best_key} (score: {best_score:.4f})")
+                if self.status:
+                    # Another key length may already have done better
+                    preview = decode_codes(periodic_decrypt(codes[:SAMPLE_MIN_LENGTH], rotations[i])[0])
+                    self.status.publish(best_score, best_key, preview, i + 1, improve_only=True)
         
-        if best_plain is None:
+        if best is None:
             print("Warning: No valid decryption found")
-            return ciphertext, key, float('inf')
-            
-        return best_plain, best_key, best_score
+            return decode_codes(codes), key, float('inf')
+
+        plaintext = periodic_decrypt(codes, rotations[best])[0]
+        if len(codes) > SAMPLE_MIN_LENGTH:
+            best_score = float(score_batch(plaintext[None], fitness=self.fitness_function)[0])
+        return decode_codes(plaintext), best_key, best_score
 
-    def find_key_length_by_ioc(self, ciphertext):
+    def find_key_length_by_ioc(self, ciphertext, stats=None):
         """Fallback IoC method respecting config bounds"""
+        stats = stats or ColumnStats(ciphertext)
         best_length = MIN_KEY_LENGTH
         best_ioc = 0
         
         for length in range(MIN_KEY_LENGTH, MAX_KEY_LENGTH + 1):
-            total_ioc = 0
-            for i in range(length):
-                column = ciphertext[i::length]
-                total_ioc += self.calculate_IoC(column)
-            avg_ioc = total_ioc / length
+            avg_ioc = stats.ioc(length)
             
             if best_length == MIN_KEY_LENGTH or abs(avg_ioc - self.EXPECTED_IOC) < abs(best_ioc - self.EXPECTED_IOC):
                 best_ioc = avg_ioc
@@ -131,41 +116,66 @@ class VigenereCracker:
         return best_length
     
     def analyze_column(self, column):
-        """Frequency analysis with correlation"""
-        column = ''.join(c for c in column if c in self.LETTERS)
-        if not column:
+        """Most likely key letter of a column by chi-squared against English"""
+        hist = column_histograms(encode_text(column), 1)
+        if not hist.any():
             return 'A'
-            
-        column_len = len(column)
-        observed_freqs = [0] * 26
-        
-        for c in column:
-            idx = ord(c) - ord('A')
-            if 0 <= idx < 26:
-                observed_freqs[idx] += 1
-        
-        observed_freqs = [f * 100 / column_len for f in observed_freqs]
-        
-        expected_freqs = [0] * 26
-        for letter, freq in self.ENGLISH_FREQS.items():
-            expected_freqs[ord(letter) - ord('A')] = freq
-        
-        best_shift = 0
-        best_correlation = float('-inf')
-        
-        for shift in range(26):
-            correlation = 0
-            shifted_freqs = observed_freqs[shift:] + observed_freqs[:shift]
-            
-            for obs, exp in zip(shifted_freqs, expected_freqs):
-                if exp > 0:
-                    correlation += obs * exp
-            
-            if correlation > best_correlation:
-                best_correlation = correlation
-                best_shift = shift
-        
-        return chr(ord('A') + best_shift)
+        return self.LETTERS[int(np.argmin(column_chi_squared(hist, self.LETTER_FREQS)[0]))]
+
+    def candidate_keys(self, stats, key_length):
+        """Beam of likely keys from the best chi-squared shifts of every column"""
+        keys, _ = beam_keys(stats.chi_squared(key_length, self.LETTER_FREQS),
+                            self.beam_width, self.top_shifts)
+        return keys
+
+    def score_keys(self, codes, keys):
+        """Fitness of many periodic keys, decrypted and scored in batches.
+
+        Long texts are ranked on their first SAMPLE_MIN_LENGTH letters, which
+        keeps the cost of a large beam independent of the text length.
+        """
+        window = codes[:SAMPLE_MIN_LENGTH]
+        step = max(1, BATCH_LETTERS // max(len(window), 1))
+        return np.concatenate([score_batch(periodic_decrypt(window, keys[start:start + step]),
+                                           fitness=self.fitness_function)
+                               for start in range(0, len(keys), step)])
+
+    def best_candidate(self, codes, keys):
+        """Best of many candidate keys; returns (key, score)"""
+        scores = self.score_keys(codes, keys)
+        best = int(np.argmin(scores))
+        return decode_codes(keys[best]), float(scores[best])
+
+    def solve_length(self, stats, key_length):
+        """Best (plaintext, key, score) for one key length"""
+        initial_key, _ = self.best_candidate(stats.codes, self.candidate_keys(stats, key_length))
+        return self.try_key_permutations(stats.codes, initial_key)
+
+    def candidate_lengths(self, ciphertext, stats):
+        """Key lengths worth a full solve, best IoC/Kasiski evidence first"""
+        evidence = key_length_evidence(ciphertext, MIN_KEY_LENGTH, MAX_KEY_LENGTH, self.EXPECTED_IOC,
+                                       (MIN_SEQUENCE_LENGTH, MAX_SEQUENCE_LENGTH), MIN_REPETITIONS, stats)
+        return [e['length'] for e in evidence[:VIGENERE_LENGTH_CANDIDATES]] or [MIN_KEY_LENGTH]
+
+    def solve_lengths(self, stats, lengths):
+        """Solve every key length, one per worker process when config.USE_PARALLEL is on.
+
+        Returns (key_length, plaintext, key, score) tuples.
+        """
+        workers = pool_workers(len(lengths))
+        if workers <= 1:
+            return [(length,) + self.solve_length(stats, length) for length in lengths]
+
+        settings = (self.fitness_function, self.top_shifts, self.beam_width)
+        results = []
+        with codes_pool(stats.codes, workers) as executor:
+            futures = [executor.submit(_solve_length, length, settings) for length in lengths]
+            for future in as_completed(futures):
+                results.append(future.result())
+                _, plaintext, key, score = results[-1]
+                if self.status:
+                    self.status.publish(score, key, plaintext, len(results), improve_only=True)
+        return results
 
     def decrypt(self, ciphertext, forced_length=None):
         try:
@@ -175,18 +185,15 @@ class VigenereCracker:
                 raise ValueError("No valid characters in input text")
         
             self.update_progress("Determining key length...")
-            key_length = forced_length if forced_length else self.determine_key_length(ciphertext)
-        
-            self.update_progress("Analyzing frequency patterns...")
-            with ThreadPoolExecutor() as executor:
-                columns = [''.join(ciphertext[i::key_length]) for i in range(key_length)]
-                key_chars = list(executor.map(self.analyze_column, columns))
-        
-            initial_key = ''.join(key_chars)
-            self.update_progress(f"Initial key found: {initial_key}")
-        
-            self.update_progress("Optimizing key...")
-            plaintext, key, score = self.try_key_permutations(ciphertext, initial_key)
+            stats = ColumnStats(ciphertext)
+            lengths = [forced_length] if forced_length else self.candidate_lengths(ciphertext, stats)
+        
+            self.update_progress(f"Solving key lengths {lengths}...")
+            results = self.solve_lengths(stats, lengths)
+            self.length_scores = {length: score for length, _, _, score in results}
+            # The final fitness decides; ties go to the shorter key
+            key_length, plaintext, key, score = min(results, key=lambda r: (r[3], r[0]))
+            print(f"Key length found: {key_length} (score: {score:.4f})")
             self.update_progress(f"Final key found: {key}")
         
             if self.best_score < float('inf'):
@@ -1,5 +1,7 @@
 """General configuration settings for decoder"""
 
+import os
+
 cipher_type = 'vigenere'
 
 """Configuration settings for Vigenere cipher decoder"""
@@ -11,30 +13,106 @@ MIN_SEQUENCE_LENGTH = 3
 MAX_SEQUENCE_LENGTH = 7
 MIN_REPETITIONS = 3
 
+# Key search: each column's best shifts by chi-squared, combined in a beam
+VIGENERE_TOP_SHIFTS = 3
+VIGENERE_BEAM_WIDTH = 200
+VIGENERE_LENGTH_CANDIDATES = 4  # Best-ranked key lengths solved in full
+
 # Statistical analysis settings
 EXPECTED_IOC = 1.73
 TARGET_FITNESS = 0.4
 MAX_ITERATIONS = 100000
 
+# Per-cipher targets (TARGET_FITNESS covers substitution); a cracker stops
+# as soon as its best score reaches its target. Targets are bigram fitness
+# scores, so runs with the trigram or quadgram scorer do not stop on them
+VIGENERE_TARGET_FITNESS = 0.4
+SHUFFLE_TARGET_FITNESS = 0.4
+POLYBIUS_TARGET_FITNESS = 0.4
+PLAYFAIR_TARGET_FITNESS = 0.4
+
+# Adaptive stopping for the annealers: every STOP_WINDOW iterations a chain
+# whose best score gained less than STOP_MIN_IMPROVEMENT while accepting
+# fewer than STOP_MAX_ACCEPTANCE of its proposals is stagnant. It restarts
+# from a random key up to STOP_RESTARTS times, then ends
+STOP_WINDOW = 2000
+STOP_MIN_IMPROVEMENT = 1e-4
+STOP_MAX_ACCEPTANCE = 0.01
+STOP_RESTARTS = 3
+
+# Word-pattern pre-solver: substitution texts that keep word breaks get key
+# letters seeded from data/word_patterns.json before annealing
+USE_WORD_PATTERNS = True
+PRESOLVE_MIN_CONFIDENCE = 0.5  # Share of words the partial key must explain
+PRESOLVE_MIN_SUPPORT = 3  # Explained words a letter needs to stay fixed; others may be swapped out
+
+# Progressive sampling for long ciphertexts: the annealers score a window of
+# evenly spaced segments that grows as the run cools, then verify the best
+# keys on the full text. Stages are (fraction of iterations done, window size)
+SAMPLE_MIN_LENGTH = 20000  # Shorter texts are always scored in full
+SAMPLE_SCHEDULE = [(0.0, 2000), (0.5, 5000), (0.8, 20000)]
+SAMPLE_SEGMENTS = 8  # Contiguous segments making up a window
+SAMPLE_VERIFY_TOP = 5  # Best keys re-scored on the full text at the end
+
 # English letter frequencies (percentages)
 ENGLISH_FREQS = {
     'E': 12.7, 'T': 9.1, 'A': 8.2, 'O': 7.5, 'I': 7.0,
     'N': 6.7, 'S': 6.3, 'H': 6.1, 'R': 6.0, 'D': 4.3
 }
 
+# Full 26-letter table (percentages) for chi-squared column statistics
+ENGLISH_LETTER_FREQS = {
+    'A': 8.2, 'B': 1.5, 'C': 2.8, 'D': 4.3, 'E': 12.7, 'F': 2.2, 'G': 2.0,
+    'H': 6.1, 'I': 7.0, 'J': 0.15, 'K': 0.77, 'L': 4.0, 'M': 2.4, 'N': 6.7,
+    'O': 7.5, 'P': 1.9, 'Q': 0.095, 'R': 6.0, 'S': 6.3, 'T': 9.1, 'U': 2.8,
+    'V': 0.98, 'W': 2.4, 'X': 0.15, 'Y': 2.0, 'Z': 0.074
+}
+
 # Program settings
 DEFAULT_INPUT_FILE = 'ciphertext.txt'
 SHOW_PROGRESS = True
 USE_PARALLEL = True
 MAX_WORKERS = 4
+MIGRATION_INTERVAL = 500  # Iterations between best-key exchanges of parallel annealing chains
+
+# Steepest-ascent hill climbing ('steepest' mode of substitution and Playfair)
+HILL_CLIMB_RESTARTS = 10  # Random restarts; the best climb wins
+HILL_CLIMB_IMPROVEMENT = 'best'  # 'best' or 'first' improving swap per step
 
 # Algorithm settings
 COOLING_RATE = 0.003
 INITIAL_TEMPERATURE = 2.0
+SCORE_CACHE_MAX_BYTES = 0  # LRU key -> score cache for the annealers, 0 disables
+# Stop scoring a proposal once it is certain to be rejected. It only pays off on
+# long texts with the bigram scorer (Playfair, 3000 letters: ~10% faster). The
+# trigram and quadgram bound assumes every n-gram still to come is the likeliest
+# one, so it rarely cuts scoring short and the chunked scoring makes runs slower
+BOUNDED_SCORING = False
+
+# Checkpoints of long searches (annealing, exhaustive shuffle). A completed run
+# clears its checkpoint; with CHECKPOINT_RESUME a run started again on the same
+# text with the same settings resumes from the last one left by a run that was
+# stopped or killed. Checkpoints are pickles, so only resume from a trusted
+# directory
+CHECKPOINTS = False
+CHECKPOINT_RESUME = False
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'checkpoints')
+CHECKPOINT_INTERVAL = 30.0  # Minimum seconds between saves
+CHECKPOINT_BUDGET = 0.01  # Share of the run time saves may take
+CHECKPOINT_CHECK_EVERY = 1000  # Iterations between checks whether a save is due
 
 # Shuffle cipher settings
 MIN_SHUFFLE_GROUP = 2
 MAX_SHUFFLE_GROUP = 8
+SHUFFLE_EXHAUSTIVE = False  # Try every permutation instead of the adjacency search
+SHUFFLE_EXACT_LENGTH = 14  # Longest block solved exactly; longer ones use beam search
+SHUFFLE_BEAM_WIDTH = 2000
+SHUFFLE_CANDIDATES = 20  # Best orderings re-scored on the decoded text
+SHUFFLE_TOP_K = 10  # Best permutations kept by the exhaustive search
+SHUFFLE_MIN_CONFIDENCE = -2.0  # Lengths whose gap is more standard deviations below the best are not searched
+SHUFFLE_DIVISOR_BONUS = 0.1  # Confidence added when a length divides the text length
+SHUFFLE_LENGTH_MARGIN = 0.1  # Share by which a less likely length's score must beat the best so far
+SHUFFLE_RANKING_LETTERS = 20000  # Letters used to rank block lengths
 
 # Polybius cipher settings
 POLYBIUS_CHARSET = 'ABCDEFGHIKLMNOPQRSTUVWXYZ'  # I/J combined
@@ -0,0 +1,150 @@
+"""
+Streaming n-gram model builder.
+
+Counts bigrams, trigrams and quadgrams of arbitrarily large plain-text
+corpora in fixed-size NumPy arrays. Files are read in chunks so memory use
+does not depend on corpus size, and large files are split into byte-range
+shards that are counted in parallel and merged.
+
+    python ngram_builder.py corpus1.txt [corpus2.txt ...] -o data/maritime
+
+writes the tables the scorers load: bigram_freqs.npy for bigram_fitness
+(see cipher_utils.use_bigram_table) and <name>_log10.npy for NgramScorer.
+"""
+
+import os
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from cipher_utils import encode_bytes
+from ngram_scorer import NGRAM_NAMES, save_table
+import config
+
+CHUNK_SIZE = 4 * 1024 * 1024   # Bytes read per step
+MIN_SHARD_SIZE = 64 * 1024 * 1024  # Smaller files are counted in one piece
+DEFAULT_SIZES = (2, 3, 4)
+
+
+def _count_into(counts, buffer, first_start):
+    """Add n-grams of buffer that start at or after first_start - (n - 1)"""
+    for n, table in counts.items():
+        start = max(first_start - (n - 1), 0)
+        count = len(buffer) - n + 1 - start
+        if count <= 0:
+            continue
+        # Rolling base-26 codes; 26**4 fits comfortably in int32
+        index = buffer[start:start + count].astype(np.int32)
+        for k in range(1, n):
+            index *= 26
+            index += buffer[start + k:start + k + count]
+        table += np.bincount(index, minlength=26 ** n)
+
+
+def count_range(path, start=0, end=None, sizes=DEFAULT_SIZES, chunk_size=CHUNK_SIZE):
+    """Count the n-grams that start inside bytes [start, end) of a file.
+
+    N-grams that run past end are completed from the following bytes, so
+    adjacent ranges together count every n-gram exactly once.
+    """
+    counts = {n: np.zeros(26 ** n, dtype=np.int64) for n in sizes}
+    overlap = max(sizes) - 1
+    carry = np.zeros(0, dtype=np.uint8)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        end = os.fstat(f.fileno()).st_size if end is None else end
+        position = start
+        while position < end:
+            data = f.read(min(chunk_size, end - position))
+            if not data:
+                break
+            position += len(data)
+            buffer = np.concatenate((carry, encode_bytes(data)))
+            # Count every n-gram that ends in the new data
+            _count_into(counts, buffer, len(carry))
+            carry = buffer[max(len(buffer) - overlap, 0):]
+
+        # Complete the n-grams that start in this range and end after it
+        tail = np.zeros(0, dtype=np.uint8)
+        while len(tail) < overlap:
+            data = f.read(4096)
+            if not data:
+                break
+            tail = np.concatenate((tail, encode_bytes(data)))
+        if len(tail):
+            tail = tail[:overlap]
+            buffer = np.concatenate((carry, tail))
+            for n, table in counts.items():
+                _count_into({n: table}, buffer[:len(carry) + n - 1], len(carry))
+    return counts
+
+
+def _count_shard(args):
+    return count_range(*args)
+
+
+def plan_shards(paths, workers):
+    """Split files into byte ranges, several per worker for load balancing"""
+    shards = []
+    for path in paths:
+        size = os.path.getsize(path)
+        pieces = max(1, min(workers * 4, size // MIN_SHARD_SIZE))
+        bounds = np.linspace(0, size, pieces + 1).astype(np.int64)
+        shards.extend((path, int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]))
+    return shards
+
+
+def count_corpus(paths, sizes=DEFAULT_SIZES, workers=None):
+    """Count n-grams over several files, sharded across worker processes"""
+    workers = workers or config.MAX_WORKERS
+    shards = [shard + (sizes,) for shard in plan_shards(paths, workers)]
+    totals = {n: np.zeros(26 ** n, dtype=np.int64) for n in sizes}
+
+    def merge(results):
+        # Shard counts are plain sums
+        for counts in results:
+            for n in sizes:
+                totals[n] += counts[n]
+
+    if workers <= 1 or len(shards) == 1:
+        merge(map(_count_shard, shards))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            merge(executor.map(_count_shard, shards))
+    return totals
+
+
+def save_bigram_freqs(counts, path):
+    """Write bigram counts as the 26x26 frequency table bigram_fitness uses"""
+    total = counts.sum()
+    if total == 0:
+        raise ValueError("Corpus contains no bigrams")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.save(path, (counts / total).reshape(26, 26))
+    return path
+
+
+def build_model(paths, output_dir, sizes=DEFAULT_SIZES, workers=None):
+    """Count a corpus and write every table the scorers load into output_dir"""
+    counts = count_corpus(paths, sizes, workers)
+    written = []
+    if 2 in counts:
+        written.append(save_bigram_freqs(counts[2], os.path.join(output_dir, 'bigram_freqs.npy')))
+    for n in sizes:
+        written.append(save_table(counts[n], n, os.path.join(output_dir, f"{NGRAM_NAMES[n]}_log10.npy")))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build n-gram models from plain-text corpora')
+    parser.add_argument('corpus', nargs='+', help='Plain-text corpus files')
+    parser.add_argument('-o', '--output-dir', required=True, help='Directory for the .npy tables')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        choices=sorted(NGRAM_NAMES), help='N-gram sizes to count')
+    parser.add_argument('-w', '--workers', type=int, default=config.MAX_WORKERS, help='Worker processes')
+    args = parser.parse_args()
+
+    for path in build_model(args.corpus, args.output_dir, tuple(sorted(set(args.sizes))), args.workers):
+        print(f"Wrote {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+N-gram log-probability scorers backed by precompiled NumPy tables.
+
+A table for n-grams of size n is a flat float32 array of 26**n log10
+probabilities, indexed by the base-26 code of the n-gram (a=0 ... z=25).
+Tables are loaded lazily with np.load(mmap_mode='r') so worker processes
+share the pages instead of each building a dict.
+"""
+
+import os
+import numpy as np
+from cipher_utils import DATA_DIR, BOUND_TOLERANCE, encode_text, bigram_fitness
+
+NGRAM_NAMES = {2: 'bigrams', 3: 'trigrams', 4: 'quadgrams'}
+SCORERS = {'bigram': 2, 'trigram': 3, 'quadgram': 4}
+
+
+def table_path(n):
+    """Default location of the log-probability table for n-grams of size n"""
+    return os.path.join(DATA_DIR, f"{NGRAM_NAMES[n]}_log10.npy")
+
+
+def ngram_codes(codes, n):
+    """Rolling base-26 codes of every n-gram in an encoded text"""
+    codes = np.asarray(codes, dtype=np.int64)
+    count = len(codes) - n + 1
+    if count <= 0:
+        return np.zeros(0, dtype=np.int64)
+    index = codes[:count].copy()
+    for k in range(1, n):
+        index *= 26
+        index += codes[k:k + count]
+    return index
+
+
+class NgramScorer:
+    """Negative mean log10 probability of a text's n-grams.
+
+    Lower is better, like bigram_fitness, so a scorer can be used anywhere a
+    cracker expects a fitness function.
+    """
+
+    def __init__(self, n=4, path=None):
+        if n not in NGRAM_NAMES:
+            raise ValueError(f"Unsupported n-gram size: {n}")
+        self.n = n
+        self.path = path or table_path(n)
+        self._table = None
+        self._min_cost = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            if not os.path.exists(self.path):
+                raise FileNotFoundError(
+                    f"No {NGRAM_NAMES[self.n]} table at {self.path}; build one with ngram_builder.py")
+            table = np.load(self.path, mmap_mode='r')
+            if table.shape != (26 ** self.n,):
+                raise ValueError(f"{self.path} is not a {NGRAM_NAMES[self.n]} table")
+            self._table = table
+        return self._table
+
+    @property
+    def min_cost(self):
+        """Lowest cost of any n-gram, -max(table); a full scan, so computed once"""
+        if self._min_cost is None:
+            self._min_cost = -float(self.table.max())
+        return self._min_cost
+
+    def __getstate__(self):
+        # Memory maps are reopened in the receiving process
+        state = self.__dict__.copy()
+        state['_table'] = None
+        return state
+
+    def score_codes(self, codes):
+        index = ngram_codes(codes[codes < 26], self.n)
+        if len(index) == 0:
+            raise Exception('Please enter text')
+        return -float(self.table[index].mean(dtype=np.float64))
+
+    def __call__(self, text):
+        return self.score_codes(encode_text(text))
+
+    def bounded_score(self, chunks, length, cutoff, stats=None):
+        """Progressive scoring for cipher_utils.bounded_score.
+
+        Every n-gram still to come costs at least -max(table), and at most
+        one comes per letter left, which bounds the final score from below.
+        Letters outside a-z are skipped, as in score_codes.
+        """
+        if length - self.n + 1 <= 0:
+            raise Exception('Please enter text')
+        min_cost = self.min_cost
+        cost = 0.0
+        count = 0  # N-grams scored so far
+        seen = 0
+        previous = np.zeros(0, dtype=np.uint8)
+        for chunk in chunks:
+            codes = np.concatenate((previous, chunk[chunk < 26]))
+            index = ngram_codes(codes, self.n)
+            cost -= float(self.table[index].sum(dtype=np.float64))
+            count += len(index)
+            seen += len(chunk)
+            previous = codes[-(self.n - 1):]
+            rest = length - seen
+            if rest > 0 and (cost + rest * min_cost) / (count + rest) > cutoff + BOUND_TOLERANCE:
+                break
+        if stats is not None:
+            stats['scored'] = stats.get('scored', 0) + seen
+            stats['skipped'] = stats.get('skipped', 0) + length - seen
+        if seen < length:
+            return float('inf')
+        if count == 0:
+            raise Exception('Please enter text')
+        return cost / count
+
+    def score_batch(self, candidates):
+        """Scores for a 2-D array of equal-length encoded candidates"""
+        candidates = np.asarray(candidates, dtype=np.int64)
+        other = candidates >= 26
+        if other.any():
+            # Skip letters outside a-z as score_codes does; rows keeping the
+            # same number of letters still score as one array
+            kept = len(candidates[0]) - other.sum(axis=1)
+            if (kept != kept[0]).any():
+                return np.array([self.score_codes(row) for row in candidates])
+            order = np.argsort(other, axis=1, kind='stable')
+            candidates = np.take_along_axis(candidates, order, axis=1)[:, :kept[0]]
+        count = candidates.shape[1] - self.n + 1
+        if count <= 0:
+            raise Exception('Please enter text')
+        index = candidates[:, :count].copy()
+        for k in range(1, self.n):
+            index *= 26
+            index += candidates[:, k:k + count]
+        return -self.table[index].mean(axis=1, dtype=np.float64)
+
+
+_scorer_cache = {}
+
+def get_scorer(name='bigram'):
+    """Return the fitness function registered under name"""
+    if name == 'bigram':
+        return bigram_fitness
+    if name not in SCORERS:
+        raise ValueError(f"Unknown scorer: {name}")
+    if name not in _scorer_cache:
+        _scorer_cache[name] = NgramScorer(SCORERS[name])
+    return _scorer_cache[name]
+
+
+def scorer_target(name, target):
+    """Stopping target for the scorer registered under name, or None for none.
+
+    Targets are bigram_fitness (L1) scores. The n-gram scorers use another
+    scale with no fixed value for English, so they never stop on a target
+    and run until they converge or reach their iteration cap.
+    """
+    return target if name == 'bigram' else None
+
+
+def save_table(counts, n, output=None):
+    """Convert raw n-gram counts to log10 probabilities and write them"""
+    output = output or table_path(n)
+    total = counts.sum()
+    if total == 0:
+        raise ValueError("Corpus contains no n-grams")
+    # Unseen n-grams get a floor well below the rarest observed one
+    floor = np.log10(0.01 / total)
+    with np.errstate(divide='ignore'):
+        logp = np.where(counts > 0, np.log10(counts / total), floor).astype(np.float32)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    np.save(output, logp)
+    return output
@@ -0,0 +1,200 @@
+"""
+Column statistics and Kasiski examination for periodic (Vigenere-type) ciphers.
+
+The text is encoded to letter codes once. For each candidate period L the
+26-bin histograms of the columns text[i::L] come from a single bincount,
+and IoC, chi-squared and correlation for every column and shift are
+computed from those histograms, so long texts and long periods stay cheap.
+
+Repeated sequences are found by sorting the integer codes of all n-grams,
+and their spacings are counted into a histogram from which the number of
+spacings divisible by each period is read off directly.
+"""
+
+import numpy as np
+from cipher_utils import encode_text
+
+# SHIFTED[s, p] is the cipher letter that decrypts to p under shift s
+SHIFTED = (np.arange(26)[None, :] + np.arange(26)[:, None]) % 26
+
+
+def letter_freqs(freqs):
+    """26-element array of a {letter: percentage} table, summing to 1"""
+    table = np.zeros(26)
+    for letter, freq in freqs.items():
+        table[ord(letter.upper()) - ord('A')] = freq
+    return table / table.sum()
+
+
+def column_histograms(codes, length):
+    """(length, 26) letter counts of the columns codes[i::length]"""
+    codes = np.asarray(codes, dtype=np.uint8)
+    full = len(codes) // length * length
+    # Column i's counts go to bins 27*i ... 27*i+26 (26 = other letters)
+    offsets = np.arange(length, dtype=np.intp) * 27
+    index = codes[:full].reshape(-1, length) + offsets
+    counts = np.bincount(index.ravel(), minlength=27 * length)
+    counts += np.bincount(codes[full:] + offsets[:len(codes) - full], minlength=27 * length)
+    return counts.reshape(length, 27)[:, :26]
+
+
+def column_ioc(hist):
+    """Index of coincidence of each column, normalised so English is ~1.73"""
+    n = hist.sum(axis=1)
+    pairs = (hist * (hist - 1)).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(n > 1, pairs / (n * (n - 1.0)) * 26.0, 0.0)
+
+
+def column_chi_squared(hist, expected):
+    """(columns, 26) chi-squared of each column decrypted with each shift"""
+    observed = hist[:, SHIFTED]
+    counts = hist.sum(axis=1)[:, None, None] * expected
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chi = np.where(counts > 0, (observed - counts) ** 2 / counts, 0.0)
+    return chi.sum(axis=2)
+
+
+def column_correlation(hist, expected):
+    """(columns, 26) correlation of each decrypted column with expected"""
+    n = np.maximum(hist.sum(axis=1), 1)[:, None, None]
+    return (hist[:, SHIFTED] * 100.0 / n * expected).sum(axis=2)
+
+
+def periodic_decrypt(codes, keys):
+    """Decrypt with many periodic keys at once: row r is (c - keys[r, i % L]) % 26"""
+    codes = np.asarray(codes, dtype=np.int16)
+    keys = np.atleast_2d(np.asarray(keys, dtype=np.int16))
+    columns = np.arange(len(codes)) % keys.shape[1]
+    return ((codes - keys[:, columns]) % 26).astype(np.uint8)
+
+
+def beam_keys(costs, beam_width, top_shifts):
+    """Cheapest keys built from the top_shifts best shifts of every column.
+
+    costs is (columns, 26), e.g. column_chi_squared. Keys are extended one
+    column at a time and only the beam_width cheapest partial keys are kept;
+    as costs add up per column this yields exactly the beam_width cheapest
+    combinations. Returns (keys, totals), cheapest first.
+    """
+    choices = np.argsort(costs, axis=1, kind='stable')[:, :top_shifts]
+    keys = np.zeros((1, 0), dtype=np.int16)
+    totals = np.zeros(1)
+    for column, shifts in enumerate(choices):
+        totals = (totals[:, None] + costs[column, shifts]).ravel()
+        keys = np.concatenate((np.repeat(keys, len(shifts), axis=0),
+                               np.tile(shifts, len(keys))[:, None]), axis=1)
+        order = np.argsort(totals, kind='stable')[:beam_width]
+        keys, totals = keys[order], totals[order]
+    return keys, totals
+
+
+def ngram_keys(codes, length):
+    """Integer key of every n-gram; base 27 keeps other letters (code 26) apart"""
+    codes = np.asarray(codes, dtype=np.int64)
+    count = len(codes) - length + 1
+    if count <= 0:
+        return np.zeros(0, dtype=np.int64)
+    keys = codes[:count].copy()
+    for k in range(1, length):
+        keys *= 27
+        keys += codes[k:k + count]
+    return keys
+
+
+def repeated_ngrams(codes, length, min_repetitions=2):
+    """Start positions of the n-grams that occur at least min_repetitions times.
+
+    Returns (positions, bounds): positions grouped by n-gram and ascending
+    within a group, and the group boundaries, so group g is
+    positions[bounds[g]:bounds[g + 1]].
+    """
+    keys = ngram_keys(codes, length)
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(1, dtype=np.intp)
+    if 27 ** length * len(keys) < 2 ** 63:
+        # Keys packed with their position are unique, so a plain sort is
+        # enough to keep positions ascending and is much faster than a stable one
+        packed = np.sort(keys * len(keys) + np.arange(len(keys)))
+        order = packed % len(keys)
+        sorted_keys = packed // len(keys)
+    else:
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(keys)])
+    keep = sizes >= min_repetitions
+    sizes = sizes[keep]
+    # Expand the kept groups back into their sorted positions
+    first = np.repeat(starts[keep], sizes)
+    offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    return order[first + offsets], np.r_[0, np.cumsum(sizes)]
+
+
+def repeat_spacings(codes, min_length, max_length, min_repetitions=2):
+    """Histogram of the spacings between consecutive repeats of each n-gram.
+
+    Covers n-grams of length min_length .. max_length - 1; entry s counts
+    the repeats s letters apart.
+    """
+    histogram = np.zeros(len(codes) + 1, dtype=np.int64)
+    for length in range(min_length, max_length):
+        positions, bounds = repeated_ngrams(codes, length, min_repetitions)
+        if len(positions) < 2:
+            continue
+        spacings = np.diff(positions)
+        # Drop differences that cross from one n-gram's group to the next
+        same = np.ones(len(spacings), dtype=bool)
+        same[bounds[1:-1] - 1] = False
+        histogram += np.bincount(spacings[same], minlength=len(histogram))[:len(histogram)]
+    return histogram
+
+
+def factor_counts(spacings, min_period, max_period):
+    """Spacings that are a multiple of each period (and longer than it)"""
+    return {period: int(spacings[2 * period::period].sum())
+            for period in range(min_period, max_period + 1)}
+
+
+def key_length_evidence(text, min_period, max_period, expected_ioc,
+                        sequence_lengths=(3, 7), min_repetitions=3, stats=None):
+    """Candidate key lengths ranked by combined IoC and Kasiski evidence.
+
+    Each entry has the period, its average column IoC, the number of repeat
+    spacings it divides and a score (distance of the IoC from English,
+    halved when Kasiski supports the period); lower scores rank first.
+    """
+    stats = stats or ColumnStats(text)
+    spacings = repeat_spacings(stats.codes, *sequence_lengths, min_repetitions)
+    factors = factor_counts(spacings, min_period, max_period)
+    evidence = []
+    for period in range(min_period, max_period + 1):
+        ioc = stats.ioc(period)
+        score = abs(ioc - expected_ioc)
+        if factors[period]:
+            score *= 0.5
+        evidence.append({'length': period, 'ioc': ioc, 'factors': factors[period], 'score': score})
+    return sorted(evidence, key=lambda e: e['score'])
+
+
+class ColumnStats:
+    """Per-period column histograms of one text, computed on demand and cached"""
+
+    def __init__(self, text):
+        self.codes = encode_text(text) if isinstance(text, str) else np.asarray(text, dtype=np.uint8)
+        self._histograms = {}
+
+    def histograms(self, length):
+        if length not in self._histograms:
+            self._histograms[length] = column_histograms(self.codes, length)
+        return self._histograms[length]
+
+    def ioc(self, length):
+        """Average column IoC for a period"""
+        return float(column_ioc(self.histograms(length)).mean())
+
+    def chi_squared(self, length, expected):
+        return column_chi_squared(self.histograms(length), expected)
+
+    def correlation(self, length, expected):
+        return column_correlation(self.histograms(length), expected)
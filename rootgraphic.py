@@ -10,10 +10,12 @@ import queue
 import time
 from colours import ColorPalettes
 from cipher_manager import run_substitution_process_wrapper
-from threading import Thread
+from status_board import StatusBoard
+from checkpoint import clear_checkpoints
+from threading import Thread, Lock
 
-def run_subprocess(cipher_text, queue):
-    return run_substitution_process_wrapper(cipher_text, queue)
+def run_subprocess(cipher_text, queue, status=None, chains=None, target=None):
+    return run_substitution_process_wrapper(cipher_text, queue, status=status, chains=chains, target=target)
 
 class CipherDecoderGUI:
     def __init__(self, root):
@@ -151,7 +153,12 @@ class CipherDecoderGUI:
         self.update_interval = 50  # Change from 500 to 50 milliseconds
         self.periodic_update()
         self.update_queue = None  # Change this line - initialize as None
+        self.status_board = None  # Best result so far, polled by check_process
+        self.last_seq = 0
         self.process = None
+        self.decode_thread = None  # Runs the non-substitution decoders
+        self.thread_board = None  # Status board the decode thread may still publish to
+        self.board_lock = Lock()  # Decides whether the GUI or the thread closes a board
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.start_time = None
         self.current_cipher = None  # Add this line
@@ -283,7 +290,17 @@ class CipherDecoderGUI:
             self.progress_canvas.coords(self.progress_rect, 2, 2, 2, 18)
             self.progress_canvas.coords(self.glow_rect, 2, 2, 2, 18)
 
-        
+
+    def discard_progress(self):
+        """Delete the checkpoints saved for the current text, so its next run starts afresh"""
+        if self.is_decoding:
+            messagebox.showwarning("Warning", "Terminate the running decoder first!")
+            return
+        cipher_text = self.text_box.get("1.0", tk.END).strip()
+        if cipher_text and messagebox.askyesno("Confirm Discard", "Discard the saved progress on this text?"):
+            for cipher in ('substitution', 'shuffle', 'playfair'):
+                clear_checkpoints(cipher, cipher_text)
+
     def setup_main_tab(self):
         input_frame = ttk.LabelFrame(self.main_tab, text="INPUT", style="Cyber.TFrame", padding="10")
         input_frame.pack(fill='both', expand=True, padx=5, pady=5)
@@ -325,6 +342,7 @@ class CipherDecoderGUI:
         ttk.Button(button_frame, text="Run Decoder", command=self.run_mcmc_algo).pack(side='left', padx=5)
         ttk.Button(button_frame, text="Clear", command=self.clear_all).pack(side='left', padx=5)
         ttk.Button(button_frame, text="Terminate", command=self.stop).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Discard Progress", command=self.discard_progress).pack(side='left', padx=5)
         self.text_box.bind('<<Modified>>', self.update_monogram)
         
     def setup_settings_tab(self):
@@ -551,8 +569,10 @@ class CipherDecoderGUI:
         # Ensure any existing process is fully cleaned up
         self.cleanup_process()
         
-        # Initialize a fresh queue for each run
+        # Initialize a fresh queue and status board for each run
         self.update_queue = Queue()
+        self.status_board = StatusBoard()
+        self.last_seq = 0
         
         cipher_text = self.text_box.get("1.0", tk.END).strip()
         if not cipher_text:
@@ -587,6 +607,7 @@ class CipherDecoderGUI:
             # Build kwargs based on cipher type
             kwargs = {
                 'queue': self.update_queue,
+                'status': self.status_board,
                 'progress_callback': self.progress_callback
             }
             
@@ -599,19 +620,26 @@ class CipherDecoderGUI:
             
             # Start decoder in separate thread
             if self.current_cipher == 'substitution':
+                # A spawned process re-imports config, so the chain count and
+                # target fitness from the settings tab are passed along explicitly
+                chains = config.MAX_WORKERS if config.USE_PARALLEL else 1
                 self.process = Process(
                     target=run_subprocess,
-                    args=(cipher_text, self.update_queue)
+                    args=(cipher_text, self.update_queue, self.status_board.name, chains,
+                          config.TARGET_FITNESS)
                 )
-                self.process.daemon = True
+                # Not a daemon: the substitution run starts its own pool of
+                # annealing chains, which exit when this process is terminated
+                self.process.daemon = False
                 self.process.start()
             else:
-                decode_thread = Thread(
+                self.thread_board = self.status_board
+                self.decode_thread = Thread(
                     target=self._run_decoder_thread,
                     args=(cipher_text, kwargs),
                     daemon=True
                 )
-                decode_thread.start()
+                self.decode_thread.start()
             
             self.check_process()
                 
@@ -634,6 +662,15 @@ class CipherDecoderGUI:
                 'type': 'finished', 
                 'result': {'success': False, 'error': str(e)}
             })
+        finally:
+            with self.board_lock:
+                # If cleanup_process has moved on from this board, it left
+                # the board open for the thread to close
+                board = kwargs['status']
+                if board is not self.status_board:
+                    board.close()
+                if self.thread_board is board:
+                    self.thread_board = None
 
     def cleanup_process(self):
         """Clean up existing process and queue"""
@@ -641,6 +678,11 @@ class CipherDecoderGUI:
             self.process.terminate()
             self.process.join(timeout=1) 
             self.process = None
+
+        if self.decode_thread and self.decode_thread.is_alive():
+            # Crackers with a running flag stop at their next check
+            self.cipher_manager.stop_decoder()
+            self.decode_thread.join(timeout=1)
         
         if self.update_queue:
             while True:
@@ -650,16 +692,27 @@ class CipherDecoderGUI:
                     break
             self.update_queue = None
 
+        with self.board_lock:
+            # A decode thread that is still running closes its board itself
+            if self.status_board and self.status_board is not self.thread_board:
+                self.status_board.close()
+            self.status_board = None
+
     def check_process(self):
         """Check for updates from decoder process/thread"""
         if self.is_decoding:
             try:
+                # Progress comes from the status board; the queue only
+                # carries start and finish events
+                update = self.status_board.read()
+                if update and update['seq'] != self.last_seq:
+                    self.last_seq = update['seq']
+                    self.update_display(update, time.time() - self.start_time)
+
                 while True:
                     try:
                         update = self.update_queue.get_nowait()
-                        if update.get('type') == 'progress':
-                            self.update_display(update, time.time() - self.start_time)
-                        elif update.get('type') == 'finished':
+                        if update.get('type') == 'finished':
                             self.is_decoding = False
                             self.display_result(update['result'])
                             return
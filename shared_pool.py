@@ -0,0 +1,65 @@
+"""
+Process pools that share one encoded ciphertext.
+
+The letter codes are copied once into a multiprocessing.shared_memory block
+that every worker attaches to when it starts, so tasks only carry their own
+arguments. Worker functions read the text with shared_codes():
+
+    workers = pool_workers(len(tasks))
+    if workers > 1:
+        with codes_pool(codes, workers) as executor:
+            results = list(executor.map(solve, tasks))  # solve calls shared_codes()
+
+The parallel settings are read from config on every call, so changes made
+at run time (e.g. from the GUI through CipherManager.update_config) apply.
+"""
+
+import multiprocessing
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import config
+
+_shared = None  # (SharedMemory, codes) attached in a worker process
+
+
+def can_start_pool():
+    """False inside a daemonic process, which cannot start a pool"""
+    return not multiprocessing.current_process().daemon
+
+
+def pool_workers(tasks=None):
+    """Worker processes to use: config.MAX_WORKERS when config.USE_PARALLEL is on, at most tasks"""
+    if not config.USE_PARALLEL or not can_start_pool():
+        return 1
+    return max(1, min(config.MAX_WORKERS, tasks) if tasks else config.MAX_WORKERS)
+
+
+def shared_codes():
+    """The ciphertext codes of the pool this worker belongs to"""
+    return _shared[1]
+
+
+def _attach(name, size):
+    global _shared
+    shm = shared_memory.SharedMemory(name=name)
+    _shared = (shm, np.ndarray((size,), dtype=np.uint8, buffer=shm.buf))
+
+
+@contextmanager
+def codes_pool(codes, workers):
+    """ProcessPoolExecutor whose workers see codes through shared_codes().
+
+    The shared block is freed when the pool has shut down.
+    """
+    codes = np.asarray(codes, dtype=np.uint8)
+    shm = shared_memory.SharedMemory(create=True, size=max(len(codes), 1))
+    try:
+        shm.buf[:len(codes)] = codes.tobytes()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(shm.name, len(codes))) as executor:
+            yield executor
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,116 @@
+"""
+Shared-memory status board for running crackers.
+
+A single fixed-layout block in multiprocessing.shared_memory holds the best
+result so far: a sequence counter, score, iteration count, iterations per
+second, the key and a plaintext preview. The key and preview fields have
+capacities chosen by the creator and recorded in the header. Writers make the
+counter odd while they write and even again when done (a seqlock), so the GUI
+or any other monitor can poll the block from any process without locks or
+pickling, and simply retries a read that raced a write.
+
+The creator owns the block and unlinks it; other processes attach by name:
+
+    board = StatusBoard()                # GUI
+    worker = StatusBoard(board.name)     # cracker process
+"""
+
+import time
+import struct
+import threading
+from multiprocessing import shared_memory
+
+# seq, score, iterations, iterations/sec, key length, text length, key capacity,
+# text capacity
+HEADER = struct.Struct('<QdQdIIII')
+KEY_SIZE = 1024  # Room for a shuffle key of about 200 positions written as a tuple
+PREVIEW_SIZE = 4096
+READ_RETRIES = 100
+
+
+class StatusBoard:
+    """Best-so-far status block shared between a cracker and its monitors"""
+
+    def __init__(self, name=None, preview_size=PREVIEW_SIZE, key_size=KEY_SIZE):
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=HEADER.size + key_size + preview_size)
+            HEADER.pack_into(self.shm.buf, 0, 0, float('inf'), 0, 0.0, 0, 0, key_size, preview_size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.key_size, self.preview_size = HEADER.unpack_from(self.shm.buf, 0)[6:]
+        self._started = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def __getstate__(self):
+        # Other processes attach to the same block by name
+        return {'name': self.name}
+
+    def __setstate__(self, state):
+        self.__init__(state['name'])
+
+    def publish(self, score, key, text='', iterations=0, improve_only=False):
+        """Write a new best result; with improve_only, only if it beats the board.
+
+        iterations=None keeps the count already on the board. Threads of one
+        process are serialised here; writers in different processes must
+        share a lock of their own.
+        """
+        with self._lock:
+            _, best, posted = HEADER.unpack_from(self.shm.buf, 0)[:3]
+            if improve_only and score >= best:
+                return
+            self._write(score, key, text, posted if iterations is None else iterations)
+
+    def _write(self, score, key, text, iterations):
+        now = time.time()
+        if self._started is None:
+            self._started = now
+        elapsed = now - self._started
+        rate = iterations / elapsed if elapsed > 0 else 0.0
+
+        key = str(key).encode('utf-8')[:self.key_size]
+        text = text[:self.preview_size].encode('utf-8')[:self.preview_size]
+        buf = self.shm.buf
+        seq = HEADER.unpack_from(buf, 0)[0]
+        struct.pack_into('<Q', buf, 0, seq + 1)
+        buf[HEADER.size:HEADER.size + len(key)] = key
+        start = HEADER.size + self.key_size
+        buf[start:start + len(text)] = text
+        HEADER.pack_into(buf, 0, seq + 1, float(score), int(iterations), rate,
+                         len(key), len(text), self.key_size, self.preview_size)
+        struct.pack_into('<Q', buf, 0, seq + 2)
+
+    def read(self):
+        """Consistent snapshot as a dict, or None if nothing was published"""
+        buf = self.shm.buf
+        for _ in range(READ_RETRIES):
+            seq, score, iterations, rate, key_len, text_len, _, _ = HEADER.unpack_from(buf, 0)
+            if seq % 2:
+                continue
+            key = bytes(buf[HEADER.size:HEADER.size + key_len])
+            start = HEADER.size + self.key_size
+            text = bytes(buf[start:start + text_len])
+            if struct.unpack_from('<Q', buf, 0)[0] != seq:
+                continue
+            if seq == 0:
+                return None
+            return {
+                'seq': seq,
+                'score': score,
+                'key': key.decode('utf-8', errors='ignore'),
+                'text': text.decode('utf-8', errors='ignore'),
+                'iterations': iterations,
+                'rate': rate,
+            }
+        return None
+
+    def close(self):
+        """Detach; the owner also frees the block"""
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
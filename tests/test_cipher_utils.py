@@ -0,0 +1,116 @@
+import random
+import numpy as np
+import pytest
+from cipher_utils import (bigram_fitness, bigram_fitness_reference, score_batch, encode_text,
+                          decode_codes, BigramScoreState, swap_pairs, bounded_score)
+from ngram_scorer import NgramScorer
+
+TEXT = ("thefultoncountygrandjurysaidfridayaninvestigationofatlantasrecentprimaryelection"
+        "producednoevidencethatanyirregularitiestookplacethejuryfurthersaidintermend"
+        "presentmentsthatthecityexecutivecommitteewhichhadoverallchargeoftheelection")
+ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def random_key(rng):
+    letters = list(ALPHABET)
+    rng.shuffle(letters)
+    return ''.join(letters)
+
+
+def decrypt(text, key):
+    return text.upper().translate(str.maketrans(ALPHABET, key))
+
+
+@pytest.mark.parametrize('text', [TEXT, TEXT[:40], 'Hello, World! It is a test.', 'ab'])
+def test_bigram_fitness_matches_reference(text):
+    assert bigram_fitness(text) == pytest.approx(bigram_fitness_reference(text), abs=1e-12)
+
+
+def test_score_batch_matches_bigram_fitness():
+    rng = random.Random(1)
+    keys = [random_key(rng) for _ in range(8)]
+    expected = [bigram_fitness(decrypt(TEXT, key)) for key in keys]
+    assert score_batch(keys, TEXT.upper()) == pytest.approx(expected, abs=1e-12)
+    rows = np.array([encode_text(decrypt(TEXT, key)) for key in keys])
+    assert score_batch(rows) == pytest.approx(expected, abs=1e-12)
+
+
+def test_swap_deltas_match_full_rescore():
+    rng = random.Random(2)
+    key = random_key(rng)
+    state = BigramScoreState.from_text(TEXT, key)
+    assert state.score == pytest.approx(bigram_fitness(decrypt(TEXT, key)), abs=1e-12)
+    for _ in range(200):
+        i, j = rng.sample(range(26), 2)
+        swapped = state.swapped_key(i, j)
+        delta = state.swap_delta(i, j)
+        assert state.score + delta == pytest.approx(bigram_fitness(decrypt(TEXT, swapped)), abs=1e-9)
+        if rng.random() < 0.5:
+            state.commit_swap(i, j, state.score + delta if rng.random() < 0.5 else None)
+            assert state.key_string() == swapped
+    assert state.score == pytest.approx(bigram_fitness(decrypt(TEXT, state.key_string())), abs=1e-9)
+
+
+def test_all_swap_deltas_match_swap_delta():
+    state = BigramScoreState.from_text(TEXT, random_key(random.Random(3)))
+    pairs, deltas = state.all_swap_deltas()
+    assert np.array_equal(pairs, swap_pairs(26))
+    expected = [state.swap_delta(i, j) for i, j in pairs]
+    assert deltas == pytest.approx(expected, abs=1e-12)
+
+
+def test_decode_codes_inverts_encode_text():
+    assert decode_codes(encode_text(TEXT)) == TEXT.upper()
+
+
+def random_table(path, n, seed):
+    np.save(path, -np.random.default_rng(seed).uniform(1, 8, 26 ** n).astype(np.float32))
+    return str(path)
+
+
+ACCENTED = "Le café était très bon, et nous avons mangé une crêpe délicieuse à côté du marché"
+
+
+def test_score_batch_skips_letters_outside_a_z():
+    rng = random.Random(4)
+    keys = [random_key(rng) for _ in range(4)]
+    text = ''.join(c for c in ACCENTED.upper() if c.isalpha())
+    expected = [bigram_fitness(decrypt(text, key)) for key in keys]
+    assert score_batch(keys, text) == pytest.approx(expected, abs=1e-12)
+    rows = np.array([encode_text(decrypt(text, key)) for key in keys])
+    assert score_batch(rows) == pytest.approx(expected, abs=1e-12)
+
+
+@pytest.mark.parametrize('n', [3, 4])
+def test_ngram_scorer_skips_letters_outside_a_z(tmp_path, n):
+    scorer = NgramScorer(n, random_table(tmp_path / 'table.npy', n, n))
+    codes = encode_text(ACCENTED)
+    expected = scorer(ACCENTED)
+    rows = np.array([codes, np.roll(codes, 5)])
+    assert scorer.score_batch(rows) == pytest.approx([expected, scorer.score_codes(rows[1])], abs=1e-9)
+    chunks = [codes[start:start + 7] for start in range(0, len(codes), 7)]
+    assert scorer.bounded_score(chunks, len(codes), float('inf')) == pytest.approx(expected, abs=1e-9)
+
+
+@pytest.mark.parametrize('n', [2, 3, 4])
+def test_bounded_score_never_rejects_an_accepted_candidate(tmp_path, n):
+    fitness = bigram_fitness if n == 2 else NgramScorer(n, random_table(tmp_path / 'table.npy', n, n))
+    rng = random.Random(n)
+    for _ in range(200):
+        length = rng.randint(n + 1, 400)
+        if rng.random() < 0.5:
+            start = rng.randrange(len(TEXT) - length) if length < len(TEXT) else 0
+            text = decrypt(TEXT[start:start + length], random_key(rng))
+        else:
+            text = ''.join(rng.choice(ALPHABET) for _ in range(length))
+        codes = encode_text(text)
+        exact = fitness(text)
+        size = rng.randint(1, 64)
+        cutoff = exact + rng.choice([-1, 1]) * rng.choice([1e-9, 1e-3, 0.05, 0.5, 5.0])
+        score = bounded_score(fitness, (codes[i:i + size] for i in range(0, len(codes), size)),
+                              len(codes), cutoff)
+        if exact < cutoff:
+            # Accepted with the full score, so it must not be cut off
+            assert score == pytest.approx(exact, abs=1e-9)
+        else:
+            assert score == float('inf') or score == pytest.approx(exact, abs=1e-9)
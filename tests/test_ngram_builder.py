@@ -0,0 +1,72 @@
+import random
+from collections import Counter
+import numpy as np
+import pytest
+import ngram_builder
+from ngram_builder import count_range, count_corpus
+
+SIZES = (2, 3, 4)
+
+
+def reference_counts(text, n):
+    """N-gram counts of the a-z letters of text, one pass in plain Python"""
+    letters = [ord(c) - 65 for c in text.upper() if 'A' <= c <= 'Z']
+    counts = Counter()
+    for i in range(len(letters) - n + 1):
+        code = 0
+        for c in letters[i:i + n]:
+            code = code * 26 + c
+        counts[code] += 1
+    return counts
+
+
+def assert_counts(counts, text):
+    """counts equals a plain-Python count of text for every size"""
+    for n in SIZES:
+        expected = np.zeros(26 ** n, dtype=np.int64)
+        for code, count in reference_counts(text, n).items():
+            expected[code] = count
+        assert np.array_equal(counts[n], expected)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    rng = random.Random(0)
+    # Letters with spaces, punctuation and digits between them, so shard
+    # boundaries fall both inside words and on bytes that are not letters
+    words = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(1, 7)))
+             for _ in range(400)]
+    text = ''.join(word + rng.choice([' ', ', ', '. ', '\n', ' 42 ', '']) for word in words)
+    path = tmp_path / 'corpus.txt'
+    path.write_text(text)
+    return str(path), text
+
+
+def test_count_range_single_pass(corpus):
+    path, text = corpus
+    assert_counts(count_range(path, sizes=SIZES, chunk_size=7), text)
+
+
+def test_adjacent_ranges_count_every_ngram_once(corpus):
+    path, text = corpus
+    size = len(text)
+    # Boundaries one byte apart split n-grams at every offset
+    for bounds in ([0, 1, 2, 3, 4, size], [0, 5, 6, 9, 10, 11, 600, size], list(range(0, size, 97)) + [size]):
+        totals = {n: np.zeros(26 ** n, dtype=np.int64) for n in SIZES}
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            for n, counts in count_range(path, start, end, SIZES, chunk_size=16).items():
+                totals[n] += counts
+        assert_counts(totals, text)
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_sharded_corpus_matches_single_pass(corpus, monkeypatch, workers):
+    path, text = corpus
+    monkeypatch.setattr(ngram_builder, 'MIN_SHARD_SIZE', 64)
+    assert len(ngram_builder.plan_shards([path], 4)) == 16
+    single = count_range(path, sizes=SIZES)
+    # Files are counted separately: no n-gram runs from one into the next
+    totals = count_corpus([path, path], SIZES, workers)
+    for n in SIZES:
+        assert np.array_equal(totals[n], 2 * single[n])
+    assert_counts(single, text)
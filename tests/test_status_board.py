@@ -0,0 +1,22 @@
+from status_board import StatusBoard
+
+
+def test_long_keys_are_not_truncated():
+    board = StatusBoard()
+    try:
+        key = tuple(range(40))
+        StatusBoard(board.name).publish(1.0, key, 'text', 10)
+        assert board.read()['key'] == str(key)
+    finally:
+        board.close()
+
+
+def test_publish_without_iterations_keeps_the_count():
+    board = StatusBoard()
+    try:
+        board.publish(1.0, 'KEY', 'first', 500)
+        board.publish(0.5, 'KEY', 'final', None)
+        snapshot = board.read()
+        assert (snapshot['iterations'], snapshot['text']) == (500, 'final')
+    finally:
+        board.close()
@@ -0,0 +1,56 @@
+import itertools
+import math
+import pytest
+from transposition import unrank_permutations, rank_shards, split_ranges
+
+
+def assert_tiles(shards, ranges):
+    """shards cover exactly the ranks of ranges, in order, without gaps or overlap"""
+    ranks = [rank for start, stop in shards for rank in range(start, stop)]
+    assert ranks == [rank for start, stop in ranges for rank in range(start, stop)]
+    assert all(stop > start for start, stop in shards)
+
+
+@pytest.mark.parametrize('n', range(1, 7))
+def test_unrank_permutations_matches_lexicographic_order(n):
+    perms = unrank_permutations(range(math.factorial(n)), n)
+    assert [tuple(int(p) for p in perm) for perm in perms] == list(itertools.permutations(range(n)))
+
+
+def nth_permutation(rank, n):
+    """Permutation of range(n) with the given lexicographic rank, one element at a time"""
+    items, perm = list(range(n)), []
+    for i in range(n, 0, -1):
+        index, rank = divmod(rank, math.factorial(i - 1))
+        perm.append(items.pop(index))
+    return tuple(perm)
+
+
+def test_unrank_permutations_beyond_float_precision():
+    n = 20
+    ranks = [0, 2 ** 53 + 1, math.factorial(n) // 3, math.factorial(n) - 1]
+    perms = [tuple(int(p) for p in perm) for perm in unrank_permutations(ranks, n)]
+    assert perms == [nth_permutation(rank, n) for rank in ranks]
+    assert perms[-1] == tuple(reversed(range(n)))
+
+
+@pytest.mark.parametrize('total, count', [(1, 1), (1, 8), (7, 3), (120, 32), (5040, 7), (math.factorial(20), 64)])
+def test_rank_shards_tile_all_ranks(total, count):
+    shards = rank_shards(total, count)
+    assert len(shards) == min(total, count)
+    assert shards[0][0] == 0 and shards[-1][1] == total
+    assert all(a[1] == b[0] for a, b in zip(shards, shards[1:]))
+    assert all(stop > start for start, stop in shards)
+
+
+@pytest.mark.parametrize('ranges, count', [
+    ([(0, 40320)], 32),
+    ([(0, 7)], 3),
+    ([(5, 6)], 16),
+    # Remaining ranks of a resumed checkpoint: uneven, partly searched shards
+    ([(13, 5040), (7000, 7001), (9000, 12000)], 32),
+    ([(3, 4), (4, 10), (100, 103)], 5),
+    ([(10, 10), (20, 50)], 4),
+])
+def test_split_ranges_tile_remaining_ranks(ranges, count):
+    assert_tiles(split_ranges(ranges, count), [(start, stop) for start, stop in ranges if stop > start])
@@ -0,0 +1,26 @@
+import pytest
+from word_patterns import presolve, text_words
+
+PLAIN = ("It was the best of times and it was the worst of times. It was the age of wisdom and "
+         "it was the age of foolishness; it was the season of light and it was the season of "
+         "darkness, we had everything before us and we had nothing before us.")
+KEY = 'QWERTYUIOPASDFGHJKLZXCVBNM'
+CIPHER = PLAIN.upper().translate(str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', KEY))
+TRUTH = {KEY[i]: chr(65 + i) for i in range(26)}
+
+
+def test_well_supported_letters_are_right():
+    mapping, confidence, support = presolve(CIPHER)
+    assert confidence >= 0.5
+    strong = [c for c in mapping if support[c] >= 3]
+    assert strong and all(mapping[c] == TRUTH[c] for c in strong)
+
+
+def test_time_limit_raises():
+    with pytest.raises(TimeoutError):
+        presolve(CIPHER * 50, budget=10 ** 9, time_limit=1e-9)
+
+
+def test_text_without_words_gives_nothing():
+    assert presolve('12345 !!!') == ({}, 0.0, {})
+    assert text_words('ab-cd') == ['AB', 'CD']
@@ -0,0 +1,241 @@
+"""
+Column-adjacency search for block transposition (shuffle) ciphers.
+
+A block key perm decodes each block as decoded[p] = block[perm[p]], so two
+neighbouring plaintext letters always come from the same pair of cipher
+positions. S[i, j], the summed bigram log-probability of position j's letter
+following position i's over every block, therefore scores any ordering as
+a path through S. The best path is found exactly (Held-Karp dynamic
+programming) for short blocks and by beam search for longer ones. The few
+best orderings are then ranked by their full log-likelihood, which adds the
+bigrams that cross from one block into the next (B[i, j]: position i of a
+block followed by position j of the next).
+
+The same matrices rank candidate block lengths before any search: only at
+the true length (or a multiple of it) does every position have a genuine
+successor inside its own block, so in-block pairs fit English much better
+than cross-block pairs.
+"""
+
+import numpy as np
+from cipher_utils import bigram_table
+
+ADJACENCY_BLOCKS = 4096  # Blocks counted per matrix product
+
+
+def bigram_log_table():
+    """(27, 27) log10 bigram probabilities; unseen pairs and other letters get a floor"""
+    matrix, mask = bigram_table()
+    seen = mask & (matrix > 0)
+    probs = matrix / matrix[seen].sum()
+    # A hundredth of the rarest bigram
+    floor = np.log10(probs[seen].min() / 100)
+    table = np.full((27, 27), floor)
+    table[:26, :26][seen] = np.log10(probs[seen])
+    return table
+
+
+def _onehot(blocks):
+    length = blocks.shape[1]
+    onehot = np.zeros((len(blocks), length * 27), dtype=np.float32)
+    np.put_along_axis(onehot, blocks + np.arange(length) * 27, 1.0, axis=1)
+    return onehot
+
+
+def _pair_scores(first, second, table):
+    """Summed log-probability of first[:, i] followed by second[:, j], for all i, j"""
+    length = first.shape[1]
+    # Letter co-occurrence of every pair of positions from a matrix product
+    # of one-hot blocks, accumulated in chunks to bound memory
+    cooccurrence = np.zeros((length * 27, length * 27))
+    for start in range(0, len(first), ADJACENCY_BLOCKS):
+        stop = start + ADJACENCY_BLOCKS
+        cooccurrence += _onehot(first[start:stop]).T @ _onehot(second[start:stop])
+    return (cooccurrence.reshape(length, 27, length, 27) * table[None, :, None, :]).sum(axis=(1, 3))
+
+
+def adjacency_scores(codes, length, table=None, max_blocks=None):
+    """(S, B) for one block length.
+
+    S[i, j] scores position j's letter following position i's in the same
+    block, B[i, j] position i of a block followed by position j of the next.
+    Only full blocks count; max_blocks limits how many are used.
+    """
+    table = bigram_log_table() if table is None else table
+    blocks = np.asarray(codes, dtype=np.intp)[:len(codes) // length * length].reshape(-1, length)
+    if max_blocks:
+        blocks = blocks[:max_blocks]
+    within = _pair_scores(blocks, blocks, table)
+    np.fill_diagonal(within, -np.inf)
+    return within, _pair_scores(blocks[:-1], blocks[1:], table)
+
+
+def ordering_likelihood(ordering, within, across):
+    """Log-likelihood of the full blocks decoded with ordering"""
+    ordering = np.asarray(ordering)
+    return float(within[ordering[:-1], ordering[1:]].sum() + across[ordering[-1], ordering[0]])
+
+
+def block_length_ranking(codes, lengths, table=None, max_letters=None, divisor_bonus=0.0):
+    """Candidate block lengths ranked by how well in-block pairs beat cross-block pairs.
+
+    A length's gap is the mean best in-block successor score minus the
+    mean best cross-block one, per pair of letters, so it is near 0 at a
+    wrong length whatever the length. Confidence is the gap's distance
+    from the best gap in standard deviations of the gaps across lengths
+    (0 for the best, negative for the others), plus divisor_bonus when the
+    length divides the text length. Only the first max_letters letters are
+    examined; lengths with fewer than two full blocks there get no gap and
+    confidence -inf. Returns dicts with length, gap, divides and
+    confidence, most likely first.
+    """
+    table = bigram_log_table() if table is None else table
+    ranking = []
+    for length in lengths:
+        max_blocks = max_letters // length if max_letters else None
+        blocks = min(len(codes) // length, max_blocks or len(codes))
+        gap = float('nan')
+        if blocks >= 2:
+            within, across = adjacency_scores(codes, length, table, max_blocks)
+            # within sums a pair per block, across one fewer
+            gap = float(within.max(axis=1).mean() / blocks - across.max(axis=1).mean() / (blocks - 1))
+        ranking.append({'length': length, 'gap': gap, 'divides': len(codes) % length == 0})
+
+    gaps = np.array([entry['gap'] for entry in ranking])
+    known = gaps[~np.isnan(gaps)]
+    best, spread = (known.max(), known.std()) if len(known) else (0.0, 0.0)
+    for entry in ranking:
+        if np.isnan(entry['gap']):
+            entry['confidence'] = float('-inf')
+            continue
+        confidence = (entry['gap'] - best) / spread if spread > 0 else 0.0
+        entry['confidence'] = float(confidence) + (divisor_bonus if entry['divides'] else 0.0)
+    return sorted(ranking, key=lambda e: -e['confidence'])
+
+
+def exact_orderings(scores):
+    """Best path through scores ending at each position (Held-Karp).
+
+    Returns (orderings, totals), best first. Costs O(2**L * L**2) time
+    and O(2**L * L) memory, so use it for short blocks only.
+    """
+    length = len(scores)
+    size = 1 << length
+    best = np.full((size, length), -np.inf)
+    parent = np.zeros((size, length), dtype=np.int8)
+    best[1 << np.arange(length), np.arange(length)] = 0.0
+    masks = np.arange(size)
+    popcount = np.zeros(size, dtype=np.int8)
+    for bit in range(length):
+        popcount += (masks >> bit) & 1
+    for count in range(2, length + 1):
+        layer = masks[popcount == count]
+        for j in range(length):
+            current = layer[(layer >> j) & 1 == 1]
+            previous = current ^ (1 << j)
+            totals = best[previous] + scores[:, j]
+            parent[current, j] = totals.argmax(axis=1)
+            best[current, j] = totals.max(axis=1)
+
+    full = size - 1
+    orderings = []
+    for last in range(length):
+        path, mask, j = [last], full, last
+        while mask != 1 << j:
+            i = int(parent[mask, j])
+            mask ^= 1 << j
+            path.append(i)
+            j = i
+        orderings.append(tuple(reversed(path)))
+    order = np.argsort(-best[full], kind='stable')
+    return [orderings[j] for j in order], best[full][order]
+
+
+def beam_orderings(scores, beam_width):
+    """Best paths through scores found by beam search.
+
+    Partial orderings are extended one position at a time. Of those that
+    cover the same positions and end at the same one, only the best is
+    kept, and then only the beam_width best overall. Returns (orderings,
+    totals), best first.
+    """
+    length = len(scores)
+    paths = np.arange(length)[:, None]
+    used = 1 << np.arange(length, dtype=np.int64)
+    totals = np.zeros(length)
+    for _ in range(length - 1):
+        extended = totals[:, None] + scores[paths[:, -1]]
+        free = (used[:, None] >> np.arange(length)) & 1 == 0
+        extended = np.where(free, extended, -np.inf)
+        rows, nexts = np.nonzero(np.isfinite(extended))
+        values = extended[rows, nexts]
+        order = np.argsort(-values, kind='stable')
+        rows, nexts, values = rows[order], nexts[order], values[order]
+        # Keep the best extension per (positions used, last position)
+        state = (used[rows] | (1 << nexts)) * length + nexts
+        _, first = np.unique(state, return_index=True)
+        first = np.sort(first)[:beam_width]
+        rows, nexts = rows[first], nexts[first]
+        paths = np.concatenate((paths[rows], nexts[:, None]), axis=1)
+        used = used[rows] | (1 << nexts)
+        totals = values[first]
+    return [tuple(int(p) for p in path) for path in paths], totals
+
+
+def permutation_index(size, perms):
+    """Source index of every decoded position of a text, one row per permutation.
+
+    Block b decodes as decoded[p] = block[perm[p]]; a trailing partial
+    block stays as it is.
+    """
+    perms = np.atleast_2d(np.asarray(perms, dtype=np.intp))
+    count, length = perms.shape
+    full = size // length * length
+    index = (np.arange(0, full, length)[None, :, None] + perms[:, None, :]).reshape(count, full)
+    tail = np.broadcast_to(np.arange(full, size), (count, size - full))
+    return np.concatenate((index, tail), axis=1)
+
+
+def decode_batch(codes, perms):
+    """(len(perms), len(codes)) array of the text decoded with every permutation"""
+    return np.asarray(codes)[permutation_index(len(codes), perms)]
+
+
+def unrank_permutations(ranks, length):
+    """Permutations with the given lexicographic ranks (factorial number system)"""
+    ranks = np.array(ranks, dtype=np.int64)
+    perms = np.empty((len(ranks), length), dtype=np.intp)
+    # Lehmer code: digit i counts the smaller elements to the right of position i
+    for i in range(length - 1, -1, -1):
+        perms[:, i] = ranks % (length - i)
+        ranks //= length - i
+    # Turn the digits into elements, right to left
+    for i in range(length - 2, -1, -1):
+        perms[:, i + 1:] += perms[:, i + 1:] >= perms[:, i:i + 1]
+    return perms
+
+
+def rank_shards(total, count):
+    """Split ranks 0 .. total - 1 into at most count contiguous (start, stop) ranges"""
+    count = min(count, total)
+    # Integer arithmetic: factorials soon exceed float precision
+    bounds = [total * k // count for k in range(count + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def split_ranges(ranges, count):
+    """Split (start, stop) rank ranges into about count contiguous shards in all"""
+    ranges = [(start, stop) for start, stop in ranges if stop > start]
+    total = sum(stop - start for start, stop in ranges)
+    shards = []
+    for start, stop in ranges:
+        pieces = max(1, count * (stop - start) // total)
+        shards.extend((start + a, start + b) for a, b in rank_shards(stop - start, pieces))
+    return shards
+
+
+def best_orderings(scores, exact_length, beam_width):
+    """Exact search up to exact_length positions, beam search beyond"""
+    if len(scores) <= exact_length:
+        return exact_orderings(scores)
+    return beam_orderings(scores, beam_width)
@@ -0,0 +1,237 @@
+"""
+Word-pattern pre-solver for substitution ciphertexts that keep word breaks.
+
+A word's letter pattern (THAT -> ABCA) survives substitution, so an index
+from patterns to dictionary words narrows every cipher word to a handful of
+candidates. presolve() searches for the assignment of candidates that
+explains the most cipher words and returns the partial key it implies.
+
+The index is a JSON file of pattern -> words, most frequent first:
+
+    python word_patterns.py corpus.txt [more.txt ...] -o data/word_patterns.json
+
+Corpora are counted as plain text; a word list with one word per line in
+frequency order works as well (data/common_words.txt builds the shipped index).
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+import numpy as np
+from collections import Counter
+from cipher_utils import DATA_DIR
+
+INDEX_PATH = os.path.join(DATA_DIR, 'word_patterns.json')
+MAX_CANDIDATES = 50  # Dictionary words tried per cipher word
+MAX_WORDS = 300  # Most frequent distinct cipher words searched
+SEARCH_BUDGET = 300  # Search nodes per presolve call
+TIME_LIMIT = 0.5  # Seconds before presolve gives up
+
+_index_cache = {}
+
+
+def word_pattern(word):
+    """Letter pattern of a word: THAT -> ABCA"""
+    first = {}
+    return ''.join(first.setdefault(c, chr(ord('A') + len(first))) for c in word)
+
+
+def text_words(text):
+    """Upper-case words of A-Z letters; anything else separates words"""
+    return re.findall(r'[A-Z]+', text.upper())
+
+
+def build_index(counts, max_words=None):
+    """Map patterns to words, most frequent first, from a Counter of words"""
+    index = {}
+    for word, _ in Counter(counts).most_common(max_words):
+        index.setdefault(word_pattern(word), []).append(word)
+    return index
+
+
+def count_words(paths):
+    """Count the words of plain-text files"""
+    counts = Counter()
+    for path in paths:
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                counts.update(text_words(line))
+    return counts
+
+
+def save_index(index, path=INDEX_PATH):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+    return path
+
+
+def load_index(path=INDEX_PATH):
+    """Pattern index from disk, cached; empty if none has been built"""
+    if path not in _index_cache:
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            _index_cache[path] = json.load(f)
+    return _index_cache[path]
+
+
+def _codes(word):
+    return np.frombuffer(word.encode('ascii'), dtype=np.uint8) - 65
+
+
+def _group(letters):
+    """Indices of the entries holding each letter code 0-25"""
+    order = np.argsort(letters, kind='stable')
+    bounds = np.searchsorted(letters[order], np.arange(27))
+    return [order[bounds[i]:bounds[i + 1]] for i in range(26)]
+
+
+def presolve(text, index=None, budget=SEARCH_BUDGET, time_limit=TIME_LIMIT):
+    """Partial substitution key from the word breaks of a ciphertext.
+
+    The MAX_WORDS most frequent cipher words are assigned dictionary words
+    of the same pattern by an iterative depth-first search that keeps the
+    mapping one-to-one. A word may stay unexplained (names, rare words). The
+    bound on what the undecided words can still explain only counts words
+    with a candidate consistent with the current mapping; how many each word
+    has left is updated as letters are assigned and unassigned instead of
+    being rechecked at every node. The search stops after budget nodes with
+    the best mapping so far, and raises TimeoutError after time_limit seconds.
+
+    Returns (mapping, confidence, support): mapping takes cipher letters to
+    plaintext letters, confidence is the share of word tokens the mapping
+    explains and support counts the explained distinct words containing
+    each mapped cipher letter.
+    """
+    deadline = time.perf_counter() + time_limit if time_limit else None
+    index = load_index() if index is None else index
+    counts = Counter(text_words(text))
+    total = sum(counts.values())
+    if not total or not index:
+        return {}, 0.0, {}
+
+    words, options = [], []
+    for word, _ in counts.most_common():
+        if len(words) == MAX_WORDS:
+            break
+        candidates = index.get(word_pattern(word))
+        if candidates:
+            words.append(word)
+            options.append(candidates[:MAX_CANDIDATES])
+    if not words:
+        return {}, 0.0, {}
+    # Most frequent first: they carry most of the score, so the first paths
+    # explored are already good and the bound prunes early
+    order = sorted(range(len(words)), key=lambda k: (-counts[words[k]], len(options[k])))
+    words, options = [words[k] for k in order], [options[k] for k in order]
+    weights = np.array([counts[w] for w in words])
+    first = np.cumsum([0] + [len(o) for o in options])  # First row of each word
+
+    # Every candidate is a row, with one (row, cipher letter, plain letter)
+    # triple per distinct letter of its word
+    triples = []
+    for k, word in enumerate(words):
+        positions = list(dict(zip(word, range(len(word)))).values())
+        rows = np.frombuffer(''.join(options[k]).encode('ascii'), dtype=np.uint8).reshape(-1, len(word))
+        triples.append((np.repeat(np.arange(first[k], first[k + 1]), len(positions)),
+                        np.tile(_codes(word)[positions], len(rows)),
+                        (rows[:, positions] - 65).ravel()))
+    row_of, cipher_of, plain_of = (np.concatenate(t) for t in zip(*triples))
+    row_word = np.repeat(np.arange(len(words)), np.diff(first))
+    by_cipher, by_plain = _group(cipher_of), _group(plain_of)
+
+    # An assignment c -> p rules out the rows with another letter where the
+    # word has c, or with p where the word has another letter; blocked counts
+    # the assignments ruling each row out
+    conflicts = {}
+    blocked = np.zeros(len(row_word), dtype=np.int32)
+    alive = np.bincount(row_word, minlength=len(words))  # Rows consistent with the mapping
+    undecided = np.ones(len(words), dtype=bool)
+
+    def assign(c, p, step):
+        if (c, p) not in conflicts:
+            c_rows, p_rows = by_cipher[ord(c) - 65], by_plain[ord(p) - 65]
+            conflicts[c, p] = np.unique(np.concatenate((
+                row_of[c_rows[plain_of[c_rows] != ord(p) - 65]],
+                row_of[p_rows[cipher_of[p_rows] != ord(c) - 65]])))
+        conflict = conflicts[c, p]
+        blocked[conflict] += step
+        changed = conflict[blocked[conflict] == (1 if step > 0 else 0)]
+        np.subtract.at(alive, row_word[changed], step)
+
+    def possible():
+        """Tokens of the undecided words that still have a live candidate"""
+        return int(weights[undecided & (alive > 0)].sum())
+
+    mapping, chosen = {}, []
+    best = {'explained': 0, 'mapping': {}, 'chosen': []}
+    nodes = 0
+
+    def enter(k, explained):
+        """Frame for deciding word k, or None for a leaf or a pruned branch"""
+        nonlocal nodes
+        if explained > best['explained']:
+            best.update(explained=explained, mapping=dict(mapping), chosen=list(chosen))
+        if k == len(words) or nodes >= budget or explained + possible() <= best['explained']:
+            return None
+        nodes += 1
+        undecided[k] = False
+        return [k, explained, 0, None]
+
+    # Frames are [word, tokens explained before it, next candidate, letters
+    # assigned by the branch being explored]; candidate len(options) skips
+    root = enter(0, 0)
+    stack = [root] if root else []
+    steps = 0
+    while stack:
+        steps += 1
+        if deadline and steps % 256 == 0 and time.perf_counter() > deadline:
+            raise TimeoutError(f"Word-pattern search exceeded {time_limit}s")
+        frame = stack[-1]
+        k, explained, ci, added = frame
+        if added is not None:
+            for c in reversed(added):
+                assign(c, mapping.pop(c), -1)
+            chosen.pop()
+            frame[3] = None
+        while ci < len(options[k]) and blocked[first[k] + ci]:
+            ci += 1
+        frame[2] = ci + 1
+        if ci < len(options[k]):
+            added = []
+            for c, p in zip(words[k], options[k][ci]):
+                if c not in mapping:
+                    mapping[c] = p
+                    assign(c, p, 1)
+                    added.append(c)
+            chosen.append(k)
+            frame[3] = added
+            child = enter(k + 1, explained + int(weights[k]))
+        elif ci == len(options[k]):
+            child = enter(k + 1, explained)
+        else:
+            undecided[k] = True
+            stack.pop()
+            continue
+        if child:
+            stack.append(child)
+
+    support = Counter(c for k in best['chosen'] for c in set(words[k]))
+    return best['mapping'], best['explained'] / total, dict(support)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the word-pattern index from corpora or word lists')
+    parser.add_argument('corpus', nargs='+', help='Plain-text corpus or word list files')
+    parser.add_argument('-o', '--output', default=INDEX_PATH, help='Index file to write')
+    parser.add_argument('--max-words', type=int, help='Keep only the most frequent words')
+    args = parser.parse_args()
+
+    index = build_index(count_words(args.corpus), args.max_words)
+    print(f"Wrote {save_index(index, args.output)} ({len(index)} patterns)")
+
+if __name__ == "__main__":
+    main()